@@ -43,10 +43,45 @@ class LazyConcreteDict(
     super().__init__(name, ctx)
     mixin.PythonConstant.init_mixin(self, self.members)
     mixin.LazyMembers.init_mixin(self, member_map)
+    # Map from member name to the member's variable, changestamp and hash.
+    self._member_hashes = {}
 
   def _convert_member(self, name, member, subst=None):
     return self.ctx.convert.constant_to_var(member)
 
+  def _get_member_hash(self, name, var):
+    """Get the hash of a member's fullhash component, caching it."""
+    # Like SimpleValue.get_fullhash, the cached hash is only recomputed if the
+    # member's values themselves change, not if the values nested in them do.
+    stamp = (len(var.bindings),) + tuple(
+        v._get_changestamps()  # pylint: disable=protected-access
+        if isinstance(v, _instance_base.SimpleValue) else v.get_fullhash()
+        for v in var.data)
+    cached = self._member_hashes.get(name)
+    if cached and cached[0] is var and cached[1] == stamp:
+      return cached[2]
+    h = hash(abstract_utils.get_var_fullhash_component(var))
+    self._member_hashes[name] = (var, stamp, h)
+    return h
+
+  def get_members_fullhash(self, names):
+    """Hash the members with the given names.
+
+    This is a cheaper equivalent of hashing
+    abstract_utils.get_dict_fullhash_component(self.members, names=names),
+    since the hashes of unchanged members are reused.
+
+    Args:
+      names: The names of the members to hash.
+
+    Returns:
+      The hash.
+    """
+    members = self.members
+    return hash(tuple(sorted(
+        (name, self._get_member_hash(name, members[name]))
+        for name in names.intersection(members))))
+
   def is_empty(self):
     return not bool(self._member_map)
 
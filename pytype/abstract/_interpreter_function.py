@@ -6,6 +6,8 @@ import hashlib
 import itertools
 import logging
 
+from pytype import metrics
+from pytype import summary_cache
 from pytype.abstract import _classes
 from pytype.abstract import _function_base
 from pytype.abstract import _instance_base
@@ -14,12 +16,18 @@ from pytype.abstract import _typing
 from pytype.abstract import abstract_utils
 from pytype.abstract import class_mixin
 from pytype.abstract import function
+from pytype.pyc import opcodes
 from pytype.pytd import pytd
+from pytype.pytd import pytd_utils
 from pytype.typegraph import cfg_utils
 
 log = logging.getLogger(__name__)
 _isinstance = abstract_utils._isinstance  # pylint: disable=protected-access
 
+# Calls of each function whose results were and weren't found in _call_cache.
+_call_cache_hits_metric = metrics.MapCounter("function_call_cache_hits")
+_call_cache_misses_metric = metrics.MapCounter("function_call_cache_misses")
+
 
 def _matches_generator_helper(type_obj, allowed_types):
   """Check if type_obj matches a Generator/AsyncGenerator type."""
@@ -45,12 +53,13 @@ def _matches_async_generator(type_obj):
   return _matches_generator_helper(type_obj, allowed_types)
 
 
-def _hash_all_dicts(*hash_args):
-  """Convenience method for hashing a sequence of dicts."""
-  components = (abstract_utils.get_dict_fullhash_component(d, names=n)
-                for d, n in hash_args)
-  return hashlib.md5(
-      b"".join(str(hash(c)).encode("utf-8") for c in components)).digest()
+def _hash_dict(vardict):
+  return hash(abstract_utils.get_dict_fullhash_component(vardict))
+
+
+def _hash_all(*hashes):
+  """Convenience method for combining a sequence of hashes."""
+  return hashlib.md5(b"".join(str(h).encode("utf-8") for h in hashes)).digest()
 
 
 def _check_classes(var, check):
@@ -116,18 +125,20 @@ class InterpreterFunction(_function_base.SignedFunction):
     annotations = annotations or {}
     overloads = ctx.vm.frame.overloads[name]
     key = (name, code,
-           _hash_all_dicts(
-               (f_globals.members, set(code.co_names)),
-               (f_locals.members,
-                set(f_locals.members) - set(code.co_varnames)), ({
-                    key: ctx.program.NewVariable([value], [], ctx.root_node)
-                    for key, value in annotations.items()
-                }, None), (dict(
-                    enumerate(
-                        ctx.program.NewVariable([f], [], ctx.root_node)
-                        for f in overloads)), None),
-               (dict(enumerate(defaults)), None),
-               (dict(enumerate(closure or ())), None)))
+           _hash_all(
+               f_globals.get_members_fullhash(frozenset(code.co_names)),
+               f_locals.get_members_fullhash(
+                   f_locals.members.keys() - set(code.co_varnames)),
+               _hash_dict({
+                   key: ctx.program.NewVariable([value], [], ctx.root_node)
+                   for key, value in annotations.items()
+               }),
+               _hash_dict(dict(
+                   enumerate(
+                       ctx.program.NewVariable([f], [], ctx.root_node)
+                       for f in overloads))),
+               _hash_dict(dict(enumerate(defaults))),
+               _hash_dict(dict(enumerate(closure or ())))))
     if key not in cls._function_cache:
       cls._function_cache[key] = cls(name, def_opcode, code, f_locals,
                                      f_globals, defaults, kw_defaults, closure,
@@ -153,6 +164,9 @@ class InterpreterFunction(_function_base.SignedFunction):
     self.closure = closure
     self._call_cache = {}
     self._call_records = []
+    # The names of the globals and locals that the code uses, for _hash_call.
+    self._global_names = frozenset(code.co_names)
+    self._local_names = frozenset(code.co_varnames)
     # TODO(b/78034005): Combine this and PyTDFunction.signatures into a single
     # way to handle multiple signatures that SignedFunction can also use.
     self._all_overloads = overloads
@@ -366,17 +380,79 @@ class InterpreterFunction(_function_base.SignedFunction):
     if (self.ctx.options.skip_repeat_calls and
         ("self" not in callargs or not self.ctx.callself_stack or
          callargs["self"].data != self.ctx.callself_stack[-1].data)):
-      callkey = _hash_all_dicts(
-          (callargs, None),
-          (frame.f_globals.members, set(self.code.co_names)),
-          (frame.f_locals.members,
-           set(frame.f_locals.members) - set(self.code.co_varnames)))
+      callkey = _hash_all(
+          _hash_dict(callargs),
+          frame.f_globals.get_members_fullhash(self._global_names),
+          frame.f_locals.get_members_fullhash(
+              frame.f_locals.members.keys() - self._local_names))
     else:
       # Make the callkey the number of times this function has been called so
       # that no call has the same key as a previous one.
       callkey = len(self._call_cache)
     return callkey
 
+  def _get_summary_type(self, node, values):
+    """Get the pytd type of some values, or None if summaries can't use it."""
+    t = pytd_utils.JoinTypes(
+        self.ctx.pytd_convert.value_to_pytd_type(node, v, set(), None)
+        for v in values)
+    return t if summary_cache.is_portable(t) else None
+
+  def _get_summary_key(self, node, callargs, frame):
+    """Get the key of this call in the function summary cache.
+
+    Args:
+      node: The current node.
+      callargs: The call's arguments.
+      frame: The call's frame.
+
+    Returns:
+      The key, or None if the call can't be summarized. See summary_cache.py.
+    """
+    code = self.code
+    if (not code.has_newlocals() or self.closure or code.co_freevars or
+        code.co_cellvars or self.f_locals is not self.f_globals or
+        self.has_overloads or code.has_generator() or code.has_async_generator() or
+        self.is_coroutine() or
+        any(hasattr(c, "co_consts") for c in code.co_consts)):
+      return None
+    ops = []
+    global_names = set()
+    for op in code.code_iter:
+      if op.annotation or isinstance(
+          op, (opcodes.STORE_GLOBAL, opcodes.DELETE_GLOBAL)):
+        # Annotations of locals are resolved in the module's namespace, and
+        # summaries don't record changes to globals.
+        return None
+      if isinstance(op, (opcodes.LOAD_GLOBAL, opcodes.LOAD_NAME)):
+        global_names.add(op.pretty_arg)
+      ops.append((op.__class__.__name__, getattr(op, "arg", None)))
+    annotations = []
+    for name, annot in sorted(self.signature.annotations.items()):
+      t = self.ctx.pytd_convert.value_instance_to_pytd_type(
+          node, annot, None, set(), None)
+      if not summary_cache.is_portable(t):
+        return None
+      annotations.append((name, pytd_utils.Print(t)))
+    arg_types = []
+    for name, var in sorted(callargs.items()):
+      t = self._get_summary_type(node, var.data)
+      if t is None:
+        return None
+      arg_types.append((name, pytd_utils.Print(t)))
+    global_types = []
+    for name in sorted(global_names):
+      if name in frame.f_globals.members:
+        t = self._get_summary_type(node, frame.f_globals.members[name].data)
+        if t is None:
+          return None
+        global_types.append((name, pytd_utils.Print(t)))
+    code_key = (code.co_name, code.co_argcount, code.co_posonlyargcount,
+                code.co_kwonlyargcount, code.co_flags, code.co_names,
+                code.co_varnames, tuple(repr(c) for c in code.co_consts),
+                tuple(ops), tuple(annotations))
+    return self.ctx.summary_cache.get_key(code_key, arg_types, global_types)
+
   def _paramspec_signature(self, callable_type, substs):
     # Unpack the paramspec substitution we have created in the matcher.
     rhs = callable_type.formal_type_parameters[0]
@@ -442,6 +518,13 @@ class InterpreterFunction(_function_base.SignedFunction):
     if (self.ctx.vm.is_at_maximum_depth() and
         not self.name.endswith(".__init__")):
       log.info("Maximum depth reached. Not analyzing %r", self.name)
+      skip_analysis = True
+    elif self.ctx.vm.is_over_budget() or self.ctx.vm.is_degraded(self):
+      log.info("Analysis budget exceeded. Not analyzing %r", self.name)
+      skip_analysis = True
+    else:
+      skip_analysis = False
+    if skip_analysis:
       self._set_callself_maybe_missing_members()
       if "return" not in annotations:
         return node, self.ctx.new_unsolvable(node)
@@ -539,11 +622,28 @@ class InterpreterFunction(_function_base.SignedFunction):
             self.ctx.vm.remaining_depth(), old_remaining_depth)
       else:
         log.info("Skipping call to %r and using cached return", self.name)
+        _call_cache_hits_metric.inc(self.name)
         ret = typeguard_return or old_ret.AssignToNewVariable(node)
         if self._store_call_records:
           # Even if the call is cached, we might not have been recording it.
           self._call_records.append((callargs, ret, node))
         return node, ret
+    _call_cache_misses_metric.inc(self.name)
+    if self.ctx.summary_cache and self.ctx.options.skip_repeat_calls:
+      summary_key = self._get_summary_key(node, callargs, frame)
+    else:
+      summary_key = None
+    if summary_key:
+      summary = self.ctx.summary_cache.load(summary_key, self.ctx.loader)
+      if summary is not None:
+        log.info("Skipping call to %r and using summarized return", self.name)
+        ret = self.ctx.convert.constant_to_var(
+            abstract_utils.AsReturnValue(summary), {}, node)
+        self._call_cache[callkey_pre] = ret, self.ctx.vm.remaining_depth()
+        if self._store_call_records or self.ctx.store_all_calls:
+          self._call_records.append((callargs, ret, node))
+        return node, typeguard_return or ret
+      num_errors = self.ctx.errorlog.num_reported
     if self.code.has_generator():
       generator = _instances.Generator(frame, self.ctx)
       # Run the generator right now, even though the program didn't call it,
@@ -580,9 +680,20 @@ class InterpreterFunction(_function_base.SignedFunction):
         ret = _instances.Coroutine(self.ctx, ret, node2).to_variable(node2)
       node_after_call = node2
     self._inner_cls_check(frame)
-    # Recompute the calllkey so that side effects are taken into account.
-    callkey_post = self._hash_call(callargs, frame)
-    self._call_cache[callkey_post] = ret, self.ctx.vm.remaining_depth()
+    # If the analysis budget ran out during the call, the call was cut short,
+    # so its result isn't reused.
+    cacheable = not self.ctx.vm.is_over_budget()
+    # Summarize the call if it didn't report errors or change its inputs.
+    if (cacheable and summary_key and
+        self.ctx.errorlog.num_reported == num_errors and
+        self._get_summary_key(node_after_call, callargs, frame) == summary_key):
+      ret_type = self._get_summary_type(node_after_call, ret.data)
+      if ret_type is not None:
+        self.ctx.summary_cache.store(summary_key, ret_type)
+    if cacheable:
+      # Recompute the calllkey so that side effects are taken into account.
+      callkey_post = self._hash_call(callargs, frame)
+      self._call_cache[callkey_post] = ret, self.ctx.vm.remaining_depth()
     if self._store_call_records or self.ctx.store_all_calls:
       self._call_records.append((callargs, ret, node_after_call))
     self.last_frame = frame
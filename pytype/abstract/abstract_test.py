@@ -1173,6 +1173,26 @@ class AbstractTest(AbstractTestBase):
     self.assertIs(abstract.Empty(self._ctx), abstract.Empty(self._ctx))
     self.assertIsNot(abstract.Deleted(self._ctx), abstract.Empty(self._ctx))
 
+  def test_members_fullhash(self):
+    d = abstract.LazyConcreteDict("globals", {}, self._ctx)
+    lst = abstract.List([], self._ctx)
+    d.members["x"] = self.new_var(lst)
+    d.members["y"] = self.new_var(self._ctx.convert.none)
+    names = frozenset({"x", "z"})
+    h = d.get_members_fullhash(names)
+    self.assertEqual(d.get_members_fullhash(names), h)
+    self.assertEqual(d.get_members_fullhash(frozenset({"x"})), h)
+    # Members that aren't in names don't affect the hash.
+    d.members["y"].AddBinding(self._ctx.convert.unsolvable, [], self._node)
+    self.assertEqual(d.get_members_fullhash(names), h)
+    # Changes to the members' values do.
+    lst.merge_instance_type_parameter(
+        self._node, abstract_utils.T, self.new_var(self._ctx.convert.none))
+    h2 = d.get_members_fullhash(names)
+    self.assertNotEqual(h2, h)
+    d.members["z"] = self.new_var(self._ctx.convert.none)
+    self.assertNotEqual(d.get_members_fullhash(names), h2)
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,193 @@
+"""A profiler that attributes analysis costs to the analyzed code.
+
+--profile profiles pytype itself, which shows where pytype spends its time but
+not which functions in the analyzed module it spends the time on. With
+--analysis-profile, the VM reports each frame that it runs and each function
+and class that it analyzes to an AnalysisProfiler, which charges the CPU time,
+opcodes, CFG nodes and bindings spent in between to them:
+  * Functions (including class bodies and the module itself) are charged with
+    the costs of the frames that run their code. "self" costs exclude the
+    frames that a frame calls, "total" costs include them. Calls of a function
+    that are already running aren't counted again in its total costs.
+  * Analyses are the top-level functions and classes that
+    CallTracer.analyze_toplevel analyzes, with the total cost of each.
+
+CFG nodes and bindings are counted by their ids, which are assigned in order of
+creation. Node counts are estimates, since the profiler only sees the nodes that
+opcodes run at.
+"""
+
+import collections
+import dataclasses
+import json
+from typing import Any, Dict, List, Tuple
+
+from pytype import metrics
+from pytype.abstract import abstract
+
+# A (kind, name, line) triple, where kind is "function" or "analysis".
+_Key = Tuple[str, str, int]
+
+
+@dataclasses.dataclass
+class _Costs:
+  """The costs of running some code."""
+
+  time: float = 0.0
+  opcodes: int = 0
+  cfg_nodes: int = 0
+  bindings: int = 0
+
+  def add(self, other: "_Costs"):
+    self.time += other.time
+    self.opcodes += other.opcodes
+    self.cfg_nodes += other.cfg_nodes
+    self.bindings += other.bindings
+
+  def sub(self, other: "_Costs"):
+    self.time -= other.time
+    self.opcodes -= other.opcodes
+    self.cfg_nodes -= other.cfg_nodes
+    self.bindings -= other.bindings
+
+
+@dataclasses.dataclass
+class _Stats:
+  """The costs charged to a function or analysis."""
+
+  calls: int = 0
+  self_costs: _Costs = dataclasses.field(default_factory=_Costs)
+  total_costs: _Costs = dataclasses.field(default_factory=_Costs)
+
+
+@dataclasses.dataclass
+class _Entry:
+  """A running frame or analysis."""
+
+  key: _Key
+  start: _Costs
+  children: _Costs = dataclasses.field(default_factory=_Costs)
+
+
+class AnalysisProfiler:
+  """Attributes analysis costs to functions and classes."""
+
+  def __init__(self, program):
+    self._program = program
+    self._num_opcodes = 0
+    self._last_node_id = 0
+    self._stack: List[_Entry] = []
+    # How many times each key is on the stack, to handle recursion.
+    self._active: Dict[_Key, int] = collections.Counter()
+    self._stats: Dict[_Key, _Stats] = collections.defaultdict(_Stats)
+
+  def _now(self, node) -> _Costs:
+    """Gets the costs so far, as of the given node."""
+    self._last_node_id = max(self._last_node_id, node.id)
+    return _Costs(metrics.get_cpu_clock(), self._num_opcodes,
+                  self._last_node_id, self._program.next_binding_id)
+
+  def count_opcode(self, node):
+    """Counts an opcode that is about to be run at the given node."""
+    self._num_opcodes += 1
+    self._last_node_id = max(self._last_node_id, node.id)
+
+  def _enter(self, key, node):
+    self._stack.append(_Entry(key, self._now(node)))
+    self._active[key] += 1
+
+  def _exit(self, key, node):
+    entry = self._stack.pop()
+    assert entry.key == key, (entry.key, key)
+    self._active[key] -= 1
+    total = self._now(node)
+    total.sub(entry.start)
+    stats = self._stats[key]
+    stats.calls += 1
+    if not self._active[key]:
+      stats.total_costs.add(total)
+    if key[0] == "analysis":
+      # Analyses are charged with total costs only.
+      return
+    own = dataclasses.replace(total)
+    own.sub(entry.children)
+    stats.self_costs.add(own)
+    for parent in reversed(self._stack):
+      if parent.key[0] != "analysis":
+        parent.children.add(total)
+        break
+
+  def enter_frame(self, frame, node):
+    """Starts charging costs to the function that a frame runs."""
+    self._enter(_get_frame_key(frame), node)
+
+  def exit_frame(self, frame, node):
+    self._exit(_get_frame_key(frame), node)
+
+  def enter_analysis(self, value, node):
+    """Starts charging costs to the analysis of a function or class."""
+    self._enter(_get_analysis_key(value), node)
+
+  def exit_analysis(self, value, node):
+    self._exit(_get_analysis_key(value), node)
+
+  def get_report(self) -> Dict[str, List[Dict[str, Any]]]:
+    """Gets the profile.
+
+    Returns:
+      A dict with a list of "functions", sorted by self time, and a list of
+      "analyses", sorted by total time. Each entry has the name and first line
+      of the function or class, its number of calls, and its costs.
+    """
+    report = {"functions": [], "analyses": []}
+    for (kind, name, line), stats in self._stats.items():
+      entry = {"name": name, "line": line, "calls": stats.calls}
+      if kind == "function":
+        entry["self"] = dataclasses.asdict(stats.self_costs)
+        report["functions"].append(entry)
+      else:
+        report["analyses"].append(entry)
+      entry["total"] = dataclasses.asdict(stats.total_costs)
+    report["functions"].sort(
+        key=lambda e: (-e["self"]["time"], e["name"], e["line"]))
+    report["analyses"].sort(
+        key=lambda e: (-e["total"]["time"], e["name"], e["line"]))
+    return report
+
+  def to_json(self) -> str:
+    return json.dumps(self.get_report(), indent=2)
+
+  def format_report(self) -> str:
+    """Formats the profile as tables."""
+    report = self.get_report()
+    lines = []
+    for title, costs_kind in (("functions", "self"), ("analyses", "total")):
+      lines.append(f"{title} (sorted by {costs_kind} time; {costs_kind} costs)")
+      lines.append(f"{'self s':>8} {'total s':>8} {'opcodes':>8} {'nodes':>8} "
+                   f"{'bindings':>8} {'calls':>6}  name")
+      for e in report[title]:
+        costs = e[costs_kind]
+        self_time = f"{e['self']['time']:8.3f}" if "self" in e else " " * 8
+        lines.append(
+            f"{self_time} {e['total']['time']:8.3f} {costs['opcodes']:8d} "
+            f"{costs['cfg_nodes']:8d} {costs['bindings']:8d} {e['calls']:6d}  "
+            f"{e['name']} (line {e['line']})")
+    return "\n".join(lines)
+
+
+def _get_frame_key(frame) -> _Key:
+  if frame.func:
+    name = frame.func.data.name
+  else:
+    name = frame.f_code.co_name
+  return "function", name, frame.f_code.co_firstlineno
+
+
+def _get_analysis_key(value) -> _Key:
+  if isinstance(value, abstract.InterpreterFunction):
+    line = value.code.co_firstlineno
+  else:
+    # A class, whose first opcode is its class statement.
+    opcode = value.get_first_opcode()
+    line = opcode.line if opcode else 0
+  return "analysis", value.name, line
@@ -0,0 +1,69 @@
+"""Tests for analysis_profiler.py."""
+
+import json
+import os
+
+from pytype.tests import test_base
+from pytype.tests import test_utils
+
+
+class AnalysisProfilerTest(test_base.BaseTest):
+  """Tests for the analysis profiler."""
+
+  def _profile(self, src, filename):
+    with test_utils.Tempdir() as d:
+      path = os.path.join(d.path, filename)
+      self.ConfigureOptions(analysis_profile=path)
+      self.Infer(src)
+      with open(path) as f:
+        return f.read()
+
+  def test_json(self):
+    report = json.loads(self._profile("""
+      def f(x):
+        return [x] * 3
+      def g():
+        return f(1) + f("")
+      class A:
+        def h(self):
+          return g()
+    """, "profile.json"))
+    functions = {e["name"]: e for e in report["functions"]}
+    self.assertLessEqual({"<module>", "f", "g", "A.h"}, functions.keys())
+    f, g, h = functions["f"], functions["g"], functions["A.h"]
+    self.assertEqual(f["line"], 1)
+    self.assertGreater(f["self"]["opcodes"], 0)
+    self.assertGreater(f["self"]["bindings"], 0)
+    # g's self costs don't include the calls of f.
+    self.assertGreater(g["total"]["opcodes"], g["self"]["opcodes"])
+    self.assertGreater(h["total"]["opcodes"], h["self"]["opcodes"])
+    analyses = {e["name"]: e for e in report["analyses"]}
+    self.assertCountEqual(analyses, ["f", "g", "A"])
+    self.assertGreaterEqual(analyses["A"]["total"]["opcodes"],
+                            h["self"]["opcodes"])
+    times = [e["self"]["time"] for e in report["functions"]]
+    self.assertEqual(times, sorted(times, reverse=True))
+
+  def test_recursion(self):
+    report = json.loads(self._profile("""
+      def f(x):
+        if x:
+          return f(x - 1)
+        return 0
+    """, "profile.json"))
+    f, = (e for e in report["functions"] if e["name"] == "f")
+    # The recursive calls are counted once in the total.
+    self.assertEqual(f["total"]["opcodes"], f["self"]["opcodes"])
+
+  def test_text(self):
+    report = self._profile("""
+      def f():
+        return 42
+    """, "profile.txt")
+    self.assertIn("functions (sorted by self time; self costs)", report)
+    self.assertIn("analyses (sorted by total time; total costs)", report)
+    self.assertIn("f (line 1)", report)
+
+
+if __name__ == "__main__":
+  test_base.main()
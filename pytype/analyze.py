@@ -56,6 +56,7 @@ def check_types(src, filename, options, loader, deep=True,
     ctx.vm.analyze(loc, defs, maximum_depth=maximum_depth)
   snapshotter.take_snapshot("analyze:check_types:post")
   _maybe_output_debug(options, ctx.program)
+  _maybe_output_analysis_profile(options, ctx.analysis_profiler)
   return Analysis(None, None, ctx.errorlog)
 
 
@@ -144,6 +145,7 @@ def infer_types(src,
     # Remove "~list" etc.:
     ast = convert_structural.extract_local(ast)
   _maybe_output_debug(options, ctx.program)
+  _maybe_output_analysis_profile(options, ctx.analysis_profiler)
   return Analysis(ast, builtins_pytd, ctx.errorlog)
 
 
@@ -158,6 +160,21 @@ def _maybe_output_debug(options, program):
         fi.write(text)
 
 
+def _maybe_output_analysis_profile(options, profiler):
+  """Maybe emit the analysis profile."""
+  if profiler:
+    if options.analysis_profile == "-":
+      log.info("=========== Analysis Profile =============\n%s",
+               profiler.format_report())
+    else:
+      if options.analysis_profile.endswith(".json"):
+        text = profiler.to_json()
+      else:
+        text = profiler.format_report()
+      with options.open_function(options.analysis_profile, "w") as fi:
+        fi.write(text)
+
+
 def make_context(options, loader, deep, **kwargs):
   """Create a context to pass to infer_types or check_types."""
   factory = _make_check_context if options.check else _make_infer_context
@@ -273,6 +273,10 @@ SUBTOOLS = [
         "--parse-pyi", action="store_true",
         dest="parse_pyi", default=False,
         help="Try parsing a PYI file. For testing of typeshed."),
+    _Arg(
+        "--warm-stub-cache", action="store_true",
+        dest="warm_stub_cache", default=False,
+        help="Parse all builtin and typeshed stubs into the --stub-cache."),
 ]
 
 
@@ -345,6 +349,22 @@ INFRASTRUCTURE_OPTIONS = [
         "--touch", type=str, action="store",
         dest="touch", default=None,
         help="Output file to touch when exit status is ok."),
+    _Arg(
+        "--skip-unchanged-output", action="store_true",
+        dest="skip_unchanged_output", default=False,
+        help=("Don't rewrite an output file if its contents would not change, "
+              "so that build tools can skip rebuilding its dependents.")),
+    _Arg(
+        "--stub-cache", type=str, action="store",
+        dest="stub_cache", default=None,
+        help=("Directory in which to cache parsed .pyi files. Processes that "
+              "use the same directory share parsed stubs.")),
+    _Arg(
+        "--function-summary-cache", type=str, action="store",
+        dest="function_summary_cache", default=None,
+        help=("Directory in which to cache the inferred return types of calls "
+              "to functions that only use builtins, so that later runs can "
+              "skip analyzing the calls.")),
     _Arg(
         "-e", "--enable-only", action="store",
         dest="enable_only", default=None,
@@ -361,6 +381,23 @@ INFRASTRUCTURE_OPTIONS = [
         "-Z", "--quick", action="store_true",
         dest="quick", default=None,
         help=("Only do an approximation.")),
+    # Budgets on the analysis of each top-level function and method, including
+    # the functions it calls. A function that exceeds a budget is treated as
+    # returning its annotated return type, or Any.
+    _Arg(
+        "--function-opcode-budget", type=int, action="store",
+        dest="function_opcode_budget", default=None,
+        help=("Maximum number of opcodes to run while analyzing a function.")),
+    _Arg(
+        "--function-cfg-node-budget", type=int, action="store",
+        dest="function_cfg_node_budget", default=None,
+        help=("Maximum number of CFG nodes to create while analyzing a "
+              "function.")),
+    _Arg(
+        "--function-binding-budget", type=int, action="store",
+        dest="function_binding_budget", default=None,
+        help=("Maximum number of bindings to create while analyzing a "
+              "function.")),
     _Arg(
         "--color", action="store", choices=["always", "auto", "never"],
         default="auto",
@@ -398,6 +435,12 @@ DEBUG_OPTIONS = [
         "--profile", type=str, action="store",
         dest="profile", default=None,
         help="Profile pytype and output the stats to the specified file."),
+    _Arg(
+        "--analysis-profile", type=str, action="store",
+        dest="analysis_profile", default=None,
+        help=("Attribute analysis time to the analyzed functions and classes "
+              "and output the report to the specified file, as JSON if the "
+              "name ends in .json (use - to add this output to the log).")),
     _Arg(
         "-v", "--verbosity", type=int, action="store",
         dest="verbosity", default=1,
@@ -639,7 +682,7 @@ class Postprocessor:
       self.output_options.verify_pickle = self.output_options.output.replace(
           file_utils.PICKLE_EXT, ".pyi")
 
-  @uses(["-input", "show_config", "-pythonpath", "version"])
+  @uses(["-input", "show_config", "-pythonpath", "version", "warm_stub_cache"])
   def _store_generate_builtins(self, generate_builtins):
     """Store the generate-builtins option."""
     if generate_builtins:
@@ -647,10 +690,17 @@ class Postprocessor:
       self.output_options.pythonpath = []
     elif (not self.output_options.input and
           not self.output_options.show_config and
-          not self.output_options.version):
+          not self.output_options.version and
+          not self.output_options.warm_stub_cache):
       self.error("Need a filename.")
     self.output_options.generate_builtins = generate_builtins
 
+  @uses(["stub_cache"])
+  def _store_warm_stub_cache(self, warm_stub_cache):
+    if warm_stub_cache and not self.output_options.stub_cache:
+      self.error("--warm-stub-cache requires --stub-cache.")
+    self.output_options.warm_stub_cache = warm_stub_cache
+
   @uses(["precompiled_builtins"])
   def _store_typeshed(self, typeshed):
     if typeshed is not None:
@@ -186,6 +186,18 @@ class PostprocessorTest(unittest.TestCase):
     self.make({"typeshed", "precompiled_builtins"}, input_options)
     self.assertIs(self.output_options.typeshed, False)
 
+  def test_warm_stub_cache(self):
+    input_options = types.SimpleNamespace(
+        warm_stub_cache=True, stub_cache="cache")
+    self.make({"warm_stub_cache", "stub_cache"}, input_options)
+    self.assertTrue(self.output_options.warm_stub_cache)
+
+  def test_warm_stub_cache_without_stub_cache(self):
+    input_options = types.SimpleNamespace(
+        warm_stub_cache=True, stub_cache=None)
+    with self.assertRaises(config.PostprocessingError):
+      self.make({"warm_stub_cache", "stub_cache"}, input_options)
+
   def test_enable_only(self):
     input_options = types.SimpleNamespace(
         disable=None,
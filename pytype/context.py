@@ -4,6 +4,7 @@ import contextlib
 import logging
 from typing import Dict, List, Tuple
 
+from pytype import analysis_profiler
 from pytype import annotation_utils
 from pytype import attribute
 from pytype import config
@@ -12,6 +13,7 @@ from pytype import errors
 from pytype import load_pytd
 from pytype import matcher
 from pytype import output
+from pytype import summary_cache
 from pytype import tracer_vm
 from pytype import vm_utils
 from pytype.abstract import abstract
@@ -56,6 +58,12 @@ class Context:
     self.converter_minimally_initialized = False
     self.convert = convert.Converter(self)
     self.pytd_convert = output.Converter(self)
+    self.summary_cache = (
+        summary_cache.SummaryCache(options.function_summary_cache, options)
+        if options.function_summary_cache else None)
+    self.analysis_profiler = (
+        analysis_profiler.AnalysisProfiler(self.program)
+        if options.analysis_profile else None)
     self.program.default_data = self.convert.unsolvable
 
     # Other context
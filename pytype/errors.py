@@ -359,6 +359,8 @@ class ErrorLogBase:
     self._errors = []
     # An error filter (initially None)
     self._filter = None
+    # The number of errors reported, including those that were filtered out.
+    self.num_reported = 0
 
   def __len__(self):
     return len(self._errors)
@@ -397,6 +399,7 @@ class ErrorLogBase:
     return any(e._severity == SEVERITY_ERROR for e in self._errors)
 
   def _add(self, error):
+    self.num_reported += 1
     if self._filter is None or self._filter(error):
       _log.info("Added error to log: %s\n%s", error.name, error)
       if _log.isEnabledFor(logging.DEBUG):
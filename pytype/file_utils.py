@@ -5,6 +5,7 @@ import errno
 import os
 import re
 import sys
+import tempfile
 
 from pytype.platform_utils import path_utils
 
@@ -41,6 +42,30 @@ def makedirs(path):
       raise
 
 
+def write_atomically(path, data: bytes):
+  """Write a file such that readers never see a partial file.
+
+  Creates the file's directory if needed.
+
+  Args:
+    path: The file to write.
+    data: The file's new contents.
+
+  Raises:
+    OSError: If the file couldn't be written.
+  """
+  directory = path_utils.dirname(path)
+  makedirs(directory)
+  fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+  try:
+    with os.fdopen(fd, "wb") as f:
+      f.write(data)
+    os.replace(tmp_path, path)
+  except BaseException:
+    os.unlink(tmp_path)
+    raise
+
+
 @contextlib.contextmanager
 def cd(path):
   """Context manager. Change the directory, and restore it afterwards.
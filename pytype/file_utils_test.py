@@ -1,5 +1,7 @@
 """Tests for file_utils.py."""
 
+import os
+
 from pytype import file_utils
 from pytype.platform_utils import path_utils
 from pytype.tests import test_utils
@@ -76,6 +78,15 @@ class FileUtilsTest(unittest.TestCase):
     with file_utils.cd(""):
       self.assertEqual(path_utils.getcwd(), d)
 
+  def test_write_atomically(self):
+    with test_utils.Tempdir() as d:
+      path = path_utils.join(d.path, "a", "b.txt")
+      file_utils.write_atomically(path, b"data1")
+      file_utils.write_atomically(path, b"data2")
+      with open(path, "rb") as f:
+        self.assertEqual(f.read(), b"data2")
+      self.assertEqual(os.listdir(path_utils.dirname(path)), ["b.txt"])
+
 
 class TestPathExpansion(unittest.TestCase):
   """Tests for file_utils.expand_path(s?)."""
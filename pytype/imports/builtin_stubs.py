@@ -2,6 +2,7 @@
 
 from pytype import pytype_source_utils
 from pytype.imports import base
+from pytype.imports import stub_cache
 from pytype.platform_utils import path_utils
 from pytype.pyi import parser
 from pytype.pytd import visitors
@@ -45,7 +46,7 @@ class BuiltinsAndTyping:
 
   def _parse_predefined(self, name, options):
     _, src = GetPredefinedFile("builtins", name, ".pytd")
-    mod = parser.parse_string(src, name=name, options=options)
+    mod = stub_cache.parse_string(src, name=name, options=options)
     return mod
 
   def load(self, options):
@@ -107,7 +108,7 @@ class BuiltinLoader(base.BuiltinLoader):
           pytd_subdir, module, as_package=as_package)
     except OSError:
       return None
-    ast = parser.parse_string(
+    ast = stub_cache.parse_string(
         src, filename=filename, name=module, options=self.options)
     assert ast.name == module
     return ast
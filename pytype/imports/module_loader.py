@@ -8,6 +8,7 @@ from pytype import config
 from pytype import file_utils
 from pytype.imports import base
 from pytype.imports import pickle_utils
+from pytype.imports import stub_cache
 from pytype.platform_utils import path_utils
 from pytype.pyi import parser
 
@@ -95,7 +96,7 @@ class ModuleLoader(base.ModuleLoader):
   def _load_pyi(self, mod_info: base.ModuleInfo):
     """Load a file and parse it into a pytd AST."""
     with self.options.open_function(mod_info.filename, "r") as f:
-      mod_ast = parser.parse_string(
+      mod_ast = stub_cache.parse_string(
           f.read(), filename=mod_info.filename, name=mod_info.module_name,
           options=parser.PyiOptions.from_toplevel_options(self.options))
     return mod_ast
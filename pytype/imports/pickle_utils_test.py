@@ -24,6 +24,22 @@ class TestPickle(test_base.UnitTest):
       d2 = pickle_utils.LoadPickle(filename, compress=True)
     self.assertEqual(d1, d2)
 
+  def test_load_snapshot(self):
+    items = [("foo", b"abc"), ("bar", b""), ("baz", b"de")]
+    with test_utils.Tempdir() as d:
+      filename = d.create_file("builtins.pickle")
+      pickle_utils.SaveSnapshot(items, filename, "1.0")
+      version, loaded = pickle_utils.LoadSnapshot(filename)
+      self.assertEqual(version, "1.0")
+      self.assertEqual([(name, bytes(data)) for name, data in loaded], items)
+
+  def test_load_snapshot_from_bad_file(self):
+    with test_utils.Tempdir() as d:
+      filename = d.create_file("builtins.pickle")
+      pickle_utils.SavePickle({}, filename, compress=True)
+      with self.assertRaises(pickle_utils.LoadPickleError):
+        pickle_utils.LoadSnapshot(filename)
+
 
 if __name__ == "__main__":
   test_base.main()
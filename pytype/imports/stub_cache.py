@@ -0,0 +1,146 @@
+"""A persistent cache of parsed stubs.
+
+Parsing a .pyi file is slow, and every pytype process parses the builtin,
+typeshed and dependency stubs it imports anew. With PyiOptions.stub_cache set,
+parse_string stores each parsed stub in that directory, encoded with
+pytd.ast_encoding, and later processes decode it instead, which is about forty
+times faster than parsing.
+
+An entry's key hashes everything that the parser's output depends on: the
+pytype version, the parser options, the module name, whether the stub is a
+package's __init__ file, and the stub's contents. Entries are therefore never
+stale, and a cache directory can be shared by processes with different options
+and by different checkouts of the same stubs. Entries are written atomically, so
+concurrent processes can share a cache.
+
+warm() parses many stubs into a cache in a process pool.
+"""
+
+import concurrent.futures
+import dataclasses
+import hashlib
+import logging
+from typing import Iterable, Optional, Tuple
+
+from pytype import __version__
+from pytype import file_utils
+from pytype import metrics
+from pytype.platform_utils import path_utils
+from pytype.pyi import parser
+from pytype.pytd import ast_encoding
+from pytype.pytd import pytd
+
+log = logging.getLogger(__name__)
+
+_hits_metric = metrics.Counter("stub_cache_hits")
+_misses_metric = metrics.Counter("stub_cache_misses")
+
+# The suffix of cache entries.
+_SUFFIX = ".ast"
+
+
+def get_key(src: str, name: Optional[str], filename: Optional[str],
+            options: parser.PyiOptions) -> str:
+  """Get the cache key of a stub."""
+  parse_options = dataclasses.replace(options, stub_cache=None)
+  h = hashlib.sha256()
+  h.update(repr((__version__.__version__, dataclasses.astuple(parse_options),
+                 name, file_utils.is_pyi_directory_init(filename))).encode())
+  h.update(b"\0")
+  h.update(src.encode("utf-8", "surrogatepass"))
+  return h.hexdigest()
+
+
+def _get_path(cache_dir, key):
+  return path_utils.join(cache_dir, key + _SUFFIX)
+
+
+def _load(path) -> Optional[pytd.TypeDeclUnit]:
+  try:
+    with open(path, "rb") as f:
+      return ast_encoding.DecodeAst(f.read())
+  except FileNotFoundError:
+    return None
+  except (OSError, ast_encoding.DecodeError) as e:
+    log.warning("Ignoring unreadable stub cache entry %s: %s", path, e)
+    return None
+
+
+def _store(path, ast):
+  try:
+    file_utils.write_atomically(path, ast_encoding.EncodeAst(ast))
+  except OSError as e:
+    log.warning("Couldn't write stub cache entry %s: %s", path, e)
+
+
+def parse_string(
+    src: str,
+    name: Optional[str] = None,
+    filename: Optional[str] = None,
+    options: Optional[parser.PyiOptions] = None,
+) -> pytd.TypeDeclUnit:
+  """Parse a pyi string, using the stub cache in options.stub_cache, if any.
+
+  Args:
+    src: The contents of the stub.
+    name: The module name.
+    filename: The filename of the stub.
+    options: The parser options.
+
+  Returns:
+    The parsed stub, as returned by parser.parse_string.
+
+  Raises:
+    parser.ParseError: If the stub can't be parsed. Errors are not cached.
+  """
+  if not (options and options.stub_cache):
+    return parser.parse_string(src, name=name, filename=filename,
+                               options=options)
+  path = _get_path(options.stub_cache, get_key(src, name, filename, options))
+  ast = _load(path)
+  if ast is not None:
+    _hits_metric.inc()
+    return ast
+  _misses_metric.inc()
+  ast = parser.parse_string(src, name=name, filename=filename, options=options)
+  _store(path, ast)
+  return ast
+
+
+def _warm_one(stub, options):
+  """Parse a stub into the cache, returning whether it could be parsed."""
+  name, filename, src = stub
+  path = _get_path(options.stub_cache, get_key(src, name, filename, options))
+  if path_utils.exists(path):
+    return True
+  try:
+    ast = parser.parse_string(src, name=name, filename=filename,
+                              options=options)
+  except Exception as e:  # pylint: disable=broad-except
+    # The error is reported again when a loader imports the stub.
+    log.info("Couldn't parse %s: %s", filename, e)
+    return False
+  _store(path, ast)
+  return True
+
+
+def warm(stubs: Iterable[Tuple[str, str, str]], options: parser.PyiOptions,
+         num_workers: Optional[int] = None) -> Tuple[int, int]:
+  """Parse stubs into the stub cache in options.stub_cache.
+
+  Args:
+    stubs: (module name, filename, contents) triples.
+    options: The parser options, with stub_cache set.
+    num_workers: The number of processes to parse in. Defaults to the number of
+      CPUs.
+
+  Returns:
+    The numbers of stubs that are now cached and that could not be parsed.
+  """
+  assert options.stub_cache, "No stub cache to warm"
+  stubs = list(stubs)
+  with concurrent.futures.ProcessPoolExecutor(max_workers=num_workers) as pool:
+    results = list(pool.map(_warm_one, stubs, [options] * len(stubs),
+                            chunksize=16))
+  num_cached = sum(results)
+  return num_cached, len(results) - num_cached
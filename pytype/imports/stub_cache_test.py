@@ -0,0 +1,102 @@
+"""Tests for stub_cache.py."""
+
+import dataclasses
+import os
+import textwrap
+from unittest import mock
+
+from pytype.imports import stub_cache
+from pytype.pyi import parser
+from pytype.pytd import pytd_utils
+from pytype.tests import test_base
+from pytype.tests import test_utils
+
+
+_SRC = """
+  from typing import List
+  class A:
+    x: List[int]
+  def f(a: A) -> str: ...
+"""
+
+
+class StubCacheTest(test_base.UnitTest):
+  """Tests for the parsed stub cache."""
+
+  def setUp(self):
+    super().setUp()
+    self.src = textwrap.dedent(_SRC)
+    self.expected = pytd_utils.Print(parser.parse_string(self.src, name="foo"))
+
+  def _options(self, cache_dir, **kwargs):
+    return parser.PyiOptions(
+        python_version=self.python_version, stub_cache=cache_dir, **kwargs)
+
+  def test_no_cache(self):
+    ast = stub_cache.parse_string(self.src, name="foo",
+                                  options=self._options(None))
+    self.assertMultiLineEqual(pytd_utils.Print(ast), self.expected)
+
+  def test_cache(self):
+    with test_utils.Tempdir() as d:
+      options = self._options(d.path)
+      ast1 = stub_cache.parse_string(self.src, name="foo", filename="foo.pyi",
+                                     options=options)
+      self.assertEqual(len(os.listdir(d.path)), 1)
+      with mock.patch.object(parser, "parse_string") as parse:
+        ast2 = stub_cache.parse_string(self.src, name="foo",
+                                       filename="foo.pyi", options=options)
+      parse.assert_not_called()
+    self.assertIsNot(ast1, ast2)
+    self.assertTrue(pytd_utils.ASTeq(ast1, ast2))
+    self.assertMultiLineEqual(pytd_utils.Print(ast2), self.expected)
+
+  def test_key(self):
+    options = self._options("cache")
+    key = stub_cache.get_key(self.src, "foo", "foo.pyi", options)
+    self.assertEqual(
+        stub_cache.get_key(self.src, "foo", "bar/foo.pyi",
+                           dataclasses.replace(options, stub_cache="other")),
+        key)
+    for other_key in (
+        stub_cache.get_key(self.src + "\n", "foo", "foo.pyi", options),
+        stub_cache.get_key(self.src, "bar", "foo.pyi", options),
+        stub_cache.get_key(self.src, "foo", "foo/__init__.pyi", options),
+        stub_cache.get_key(self.src, "foo", "foo.pyi",
+                           dataclasses.replace(options, platform="win32")),
+    ):
+      self.assertNotEqual(other_key, key)
+
+  def test_corrupt_entry(self):
+    with test_utils.Tempdir() as d:
+      options = self._options(d.path)
+      key = stub_cache.get_key(self.src, "foo", None, options)
+      d.create_file(key + ".ast", "corrupt")
+      ast = stub_cache.parse_string(self.src, name="foo", options=options)
+      self.assertMultiLineEqual(pytd_utils.Print(ast), self.expected)
+      # The entry was replaced.
+      with mock.patch.object(parser, "parse_string") as parse:
+        stub_cache.parse_string(self.src, name="foo", options=options)
+      parse.assert_not_called()
+
+  def test_parse_error(self):
+    with test_utils.Tempdir() as d:
+      with self.assertRaises(parser.ParseError):
+        stub_cache.parse_string("x = 1 +", name="foo",
+                                options=self._options(d.path))
+      self.assertFalse(os.listdir(d.path))
+
+  def test_warm(self):
+    stubs = [("foo", "foo.pyi", self.src), ("bar", "bar.pyi", "x = 1 +")]
+    with test_utils.Tempdir() as d:
+      options = self._options(d.path)
+      self.assertEqual(stub_cache.warm(stubs, options, num_workers=1), (1, 1))
+      with mock.patch.object(parser, "parse_string") as parse:
+        ast = stub_cache.parse_string(self.src, name="foo",
+                                      filename="foo.pyi", options=options)
+      parse.assert_not_called()
+    self.assertMultiLineEqual(pytd_utils.Print(ast), self.expected)
+
+
+if __name__ == "__main__":
+  test_base.main()
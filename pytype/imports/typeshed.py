@@ -11,8 +11,8 @@ from pytype import pytype_source_utils
 from pytype import utils
 from pytype.imports import base
 from pytype.imports import builtin_stubs
+from pytype.imports import stub_cache
 from pytype.platform_utils import path_utils
-from pytype.pyi import parser
 
 
 def _get_module_names_in_path(lister, path, python_version):
@@ -451,6 +451,6 @@ class TypeshedLoader(base.BuiltinLoader):
     except OSError:
       return None, None
 
-    ast = parser.parse_string(src, filename=filename, name=module_name,
-                              options=self.options)
+    ast = stub_cache.parse_string(src, filename=filename, name=module_name,
+                                  options=self.options)
     return filename, ast
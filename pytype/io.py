@@ -199,10 +199,24 @@ def check_or_generate_pyi(options, loader=None, ctx=None) -> AnalysisResult:
   return AnalysisResult(options, loader, ctx, errorlog, result, ast)
 
 
+def _is_unchanged(options, contents, filename):
+  """Whether the file already has the given contents."""
+  try:
+    with options.open_function(filename, "r") as fi:
+      return fi.read() == contents
+  except OSError:
+    return False
+
+
 def _write_pyi_output(options, contents, filename):
   assert filename
   if filename == "-":
     sys.stdout.write(contents)
+  elif options.skip_unchanged_output and _is_unchanged(
+      options, contents, filename):
+    # The pyi is printed from a canonically ordered ast, so equal contents mean
+    # an unchanged interface.
+    log.info("pyi %r => %r is unchanged", options.input, filename)
   else:
     log.info("write pyi %r => %r", options.input, filename)
     with options.open_function(filename, "w") as fi:
@@ -271,7 +285,8 @@ def write_pickle(ast, options, loader=None):
       raise AssertionError()
   pickle_utils.StoreAst(ast, options.output, options.open_function,
                         src_path=options.input,
-                        metadata=options.pickle_metadata)
+                        metadata=options.pickle_metadata,
+                        skip_unchanged=options.skip_unchanged_output)
 
 
 def print_error_doc_url(errorlog):
@@ -2,6 +2,7 @@
 
 import contextlib
 import io as builtins_io
+import os
 import sys
 import textwrap
 import traceback
@@ -11,6 +12,7 @@ from pytype import io
 from pytype.platform_utils import path_utils
 from pytype.platform_utils import tempfile as compatible_tempfile
 from pytype.pytd import pytd
+from pytype.tests import test_utils
 
 import unittest
 
@@ -135,6 +137,37 @@ class IOTest(unittest.TestCase):
         output="/dev/null" if sys.platform != "win32" else "NUL")
     io.write_pickle(ast, options)  # just make sure we don't crash
 
+  def _process_twice(self, src, new_src, ext="pyi", **kwargs):
+    """Process a file, change it, process it again and report rewrites."""
+    with test_utils.Tempdir() as d:
+      filename = d.create_file("foo.py", src)
+      output = path_utils.join(d.path, "foo." + ext)
+      options = config.Options.create(
+          filename, output=output, skip_unchanged_output=True, **kwargs)
+      self.assertEqual(io.process_one_file(options), 0)
+      os.utime(output, (0, 0))
+      d.create_file("foo.py", new_src)
+      self.assertEqual(io.process_one_file(options), 0)
+      return os.stat(output).st_mtime != 0
+
+  def test_skip_unchanged_pyi(self):
+    self.assertFalse(self._process_twice("x = 1", "x = 2"))
+
+  def test_rewrite_changed_pyi(self):
+    self.assertTrue(self._process_twice("x = 1", "x = ''"))
+
+  def test_skip_unchanged_pickle(self):
+    self.assertFalse(self._process_twice(
+        "import os\ndef f(): return os.getcwd()",
+        "import os\ndef f(): return os.getcwd() + ''", ext="pickled",
+        pickle_output=True, module_name="foo"))
+
+  def test_rewrite_changed_pickle(self):
+    self.assertTrue(self._process_twice(
+        "import os\ndef f(): return os.getcwd()",
+        "import os\ndef f(): return os.getpid()", ext="pickled",
+        pickle_output=True, module_name="foo"))
+
 
 if __name__ == "__main__":
   unittest.main()
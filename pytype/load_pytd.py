@@ -1,14 +1,17 @@
 """Load and link .pyi files."""
 
-import collections
+import collections.abc
 import dataclasses
 import logging
 import os
 
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Mapping, Optional
 
+from pytype import __version__
 from pytype import file_utils
+from pytype import metrics
 from pytype import module_utils
+from pytype import utils
 from pytype.imports import base as imports_base
 from pytype.imports import builtin_stubs
 from pytype.imports import module_loader
@@ -16,6 +19,7 @@ from pytype.imports import pickle_utils
 from pytype.imports import typeshed
 from pytype.platform_utils import path_utils
 from pytype.pyi import parser
+from pytype.pytd import interning
 from pytype.pytd import pytd
 from pytype.pytd import pytd_utils
 from pytype.pytd import serialize_ast
@@ -30,6 +34,20 @@ _ALWAYS_PREFER_TYPESHED = frozenset({"typing_extensions"})
 _AST = pytd.TypeDeclUnit
 ModuleInfo = imports_base.ModuleInfo
 
+# Builtin and typeshed stub loaders shared by all Loaders in this process, keyed
+# by pyi options, missing modules and typeshed use. Only populated after
+# share_stub_loaders() has been called, which long-lived processes that analyze
+# many modules (see tools/analyze_project/worker.py) do so that each stub is
+# parsed only once.
+_shared_stub_loaders = None
+
+# Modules in precompiled builtins, and how many of them were unpickled.
+_snapshot_modules_metric = metrics.Counter("precompiled_modules_present")
+_snapshot_unpickled_metric = metrics.Counter("precompiled_modules_unpickled")
+
+# The number of ClassType nodes visited to fill in pointers after each load.
+_classtype_nodes_metric = metrics.Distribution("classtype_nodes_resolved")
+
 
 def create_loader(options, missing_modules=()):
   """Create a pytd loader."""
@@ -42,6 +60,66 @@ def create_loader(options, missing_modules=()):
     return Loader(options, missing_modules=missing_modules)
 
 
+def _get_snapshot_version(options):
+  """Identifies the pytype build and target that a snapshot is valid for."""
+  return (f"{__version__.__version__} "
+          f"python{utils.format_version(options.python_version)}")
+
+
+def share_stub_loaders():
+  """Share parsed builtin and typeshed stubs between loaders in this process."""
+  global _shared_stub_loaders
+  if _shared_stub_loaders is None:
+    _shared_stub_loaders = {}
+
+
+def _create_stub_loaders(pyi_options, missing_modules, use_typeshed):
+  """Create (or retrieve the shared) builtin and typeshed stub loaders.
+
+  Args:
+    pyi_options: The pyi parser options.
+    missing_modules: Modules known to be missing from typeshed.
+    use_typeshed: Whether typeshed will be used. Indexing typeshed is slow, so
+      if it is not used (e.g., with precompiled builtins), no typeshed loader
+      is created.
+
+  Returns:
+    A tuple of the builtin and typeshed stub loaders.
+  """
+  if _shared_stub_loaders is None:
+    return (builtin_stubs.BuiltinLoader(pyi_options),
+            typeshed.TypeshedLoader(pyi_options, missing_modules)
+            if use_typeshed else None)
+  key = (dataclasses.astuple(pyi_options), tuple(sorted(missing_modules)),
+         bool(use_typeshed))
+  if key not in _shared_stub_loaders:
+    _shared_stub_loaders[key] = (
+        _MemoizingStubLoader(builtin_stubs.BuiltinLoader(pyi_options)),
+        _MemoizingStubLoader(
+            typeshed.TypeshedLoader(pyi_options, missing_modules))
+        if use_typeshed else None)
+  return _shared_stub_loaders[key]
+
+
+class _MemoizingStubLoader(imports_base.BuiltinLoader):
+  """Remembers the stubs parsed by another stub loader.
+
+  Freshly parsed stubs contain no ClassType nodes, which are the only pytd
+  nodes that loaders modify in place, so it is safe for several loaders to
+  resolve the same parsed stub.
+  """
+
+  def __init__(self, loader):
+    self._loader = loader
+    self._cache = {}
+
+  def load_module(self, namespace, module_name):
+    key = (namespace, module_name)
+    if key not in self._cache:
+      self._cache[key] = self._loader.load_module(namespace, module_name)
+    return self._cache[key]
+
+
 def _is_package(filename):
   if filename == os.devnull:
     # imports_map_loader adds os.devnull entries for __init__.py files in
@@ -73,8 +151,8 @@ class Module:
       - "{filename}" for other pyi files.
     ast: The parsed PyTD. Internal references will be resolved, but
       NamedType nodes referencing other modules might still be unresolved.
-    pickle: The AST as a pickled string. As long as this field is not None, the
-      ast will be None.
+    pickle: The AST as pickled bytes, possibly a view of a memory-mapped file.
+      As long as this field is not None, the ast will be None.
     has_unresolved_pointers: Whether all ClassType pointers have been filled in
     metadata: The metadata extracted from the picked file.
   """
@@ -113,41 +191,100 @@ class BadDependencyError(Exception):
     return str(self.args[0])
 
 
+class _AstMap(collections.abc.Mapping):
+  """A read-only {name: ast} view of the modules with a filled-in ast.
+
+  The view is live, so it does not have to be rebuilt whenever a module is
+  loaded.
+  """
+
+  def __init__(self, modules: Dict[str, Module]):
+    self._modules = modules
+
+  def __getitem__(self, key):
+    module = self._modules.get(key)
+    if module is None or not module.ast:
+      raise KeyError(key)
+    return module.ast
+
+  def __contains__(self, key):
+    module = self._modules.get(key)
+    return bool(module and module.ast)
+
+  def __iter__(self):
+    return (name for name, module in self._modules.items() if module.ast)
+
+  def __len__(self):
+    return sum(1 for _ in self)
+
+  def get(self, key, default=None):
+    module = self._modules.get(key)
+    return module.ast if module and module.ast else default
+
+
 class _ModuleMap:
   """A map of fully qualified module name -> Module."""
 
-  def __init__(self, options, modules):
+  def __init__(self, options, modules, pickled_modules=None):
     self.options = options
-    self._modules: Dict[str, Module] = modules or self._base_modules()
-    if self._modules["builtins"].needs_unpickling():
-      self._unpickle_module(self._modules["builtins"])
-    if self._modules["typing"].needs_unpickling():
-      self._unpickle_module(self._modules["typing"])
+    # Modules from precompiled builtins that have not been looked up yet, as a
+    # map from module name to pickled ast. A Module is only created for them
+    # on first lookup.
+    self._pickled_modules = dict(pickled_modules or ())
+    self._modules: Dict[str, Module] = modules or {}
+    if not self._modules and not self._pickled_modules:
+      self._modules = self._base_modules()
+    self._ast_map = _AstMap(self._modules)
+    # Names of modules whose ClassType pointers have not been filled in yet.
+    self._unresolved = {name for name, module in self._modules.items()
+                        if module.has_unresolved_pointers}
+    if self["builtins"].needs_unpickling():
+      self._unpickle_module(self["builtins"])
+    if self["typing"].needs_unpickling():
+      self._unpickle_module(self["typing"])
     self._concatenated = None
 
+  def _get_module(self, key) -> Optional[Module]:
+    if key not in self._modules and key in self._pickled_modules:
+      self._modules[key] = Module(
+          key, filename=None, ast=None, pickle=self._pickled_modules.pop(key),
+          has_unresolved_pointers=False)
+    return self._modules.get(key)
+
   def __getitem__(self, key):
-    return self._modules[key]
+    module = self._get_module(key)
+    if module is None:
+      raise KeyError(key)
+    return module
 
   def __setitem__(self, key, val):
+    self._pickled_modules.pop(key, None)
     self._modules[key] = val
+    if val.has_unresolved_pointers:
+      self._unresolved.add(key)
+    else:
+      self._unresolved.discard(key)
 
   def __delitem__(self, key):
     del self._modules[key]
+    self._unresolved.discard(key)
 
   def __contains__(self, key):
-    return key in self._modules
+    return key in self._modules or key in self._pickled_modules
 
   def items(self):
+    """Modules that have been looked up, as (name, Module) pairs."""
     return self._modules.items()
 
   def values(self):
+    """Modules that have been looked up."""
     return self._modules.values()
 
   def get(self, key):
-    return self._modules.get(key)
+    return self._get_module(key)
 
   def get_existing_ast(self, module_name: str) -> Optional[_AST]:
-    existing = self._modules.get(module_name)
+    existing = self._get_module(module_name)
     if existing:
       if existing.needs_unpickling():
         self._unpickle_module(existing)
@@ -158,10 +295,17 @@ class _ModuleMap:
     """All module ASTs that are not None."""
     return (module.ast for module in self._modules.values() if module.ast)
 
-  def get_module_map(self) -> Dict[str, _AST]:
-    """Get a {name: ast} map of all modules with a filled-in ast."""
-    return {name: module.ast for name, module in self._modules.items()
-            if module.ast}
+  def get_module_map(self) -> Mapping[str, _AST]:
+    """Get a live {name: ast} view of all modules with a filled-in ast."""
+    return self._ast_map
+
+  def get_unresolved(self) -> List[str]:
+    """Get the names of modules whose ClassType pointers are unresolved."""
+    return sorted(self._unresolved)
+
+  def mark_resolved(self, name):
+    self._modules[name].has_unresolved_pointers = False
+    self._unresolved.discard(name)
 
   def get_resolved_modules(self) -> Dict[str, ResolvedModule]:
     """Get a {name: ResolvedModule} map of all resolved modules."""
@@ -196,17 +340,18 @@ class _ModuleMap:
       if not m.pickle:
         continue
       loaded_ast = pickle_utils.LoadAst(m.pickle)
+      _snapshot_unpickled_metric.inc()
       deps = [d for d, _ in loaded_ast.dependencies if d != loaded_ast.ast.name]
       loaded_ast = serialize_ast.EnsureAstName(loaded_ast, m.module_name)
-      assert m.module_name in self._modules
+      assert m.module_name in self
       for dependency in deps:
         module_prefix = dependency
-        while module_prefix not in self._modules:
+        while module_prefix not in self:
           if "." in module_prefix:
             module_prefix, _, _ = module_prefix.rpartition(".")
           else:
             raise KeyError(f"Module not found: {dependency}")
-        todo.append(self._modules[module_prefix])
+        todo.append(self[module_prefix])
       newly_loaded_asts.append(loaded_ast)
       m.ast = loaded_ast.ast
       if _is_package(loaded_ast.src_path):
@@ -314,16 +459,16 @@ class Loader:
     typing: The typing ast.
   """
 
-  def __init__(self, options, modules=None, missing_modules=()):
+  def __init__(self, options, modules=None, missing_modules=(),
+               pickled_modules=None):
     self.options = options
-    self._modules = _ModuleMap(options, modules)
+    self._modules = _ModuleMap(options, modules, pickled_modules)
     self.builtins = self._modules["builtins"].ast
     self.typing = self._modules["typing"].ast
     self._module_loader = module_loader.ModuleLoader(options)
     pyi_options = parser.PyiOptions.from_toplevel_options(options)
-    self._builtin_loader = builtin_stubs.BuiltinLoader(pyi_options)
-    self._typeshed_loader = typeshed.TypeshedLoader(
-        pyi_options, missing_modules)
+    self._builtin_loader, self._typeshed_loader = _create_stub_loaders(
+        pyi_options, missing_modules, options.typeshed)
     self._resolver = _Resolver(self.builtins)
     self._import_name_cache = {}  # performance cache
     self._aliases = collections.defaultdict(dict)
@@ -351,10 +496,12 @@ class Loader:
     # Preparing an ast for pickling clears its class pointers, making it
     # unsuitable for reuse, so we have to discard the builtins cache.
     builtin_stubs.InvalidateCache()
-    # Now pickle the pickles. We keep the "inner" modules as pickles as a
-    # performance optimization - unpickling is slow.
-    pickle_utils.SavePickle(items, filename, compress=True,
-                            open_function=self.options.open_function)
+    # We keep the modules as separate pickles in a memory-mappable snapshot as a
+    # performance optimization - unpickling is slow, and most runs only need a
+    # few modules.
+    pickle_utils.SaveSnapshot(items, filename,
+                              _get_snapshot_version(self.options),
+                              open_function=self.options.open_function)
 
   def _resolve_external_and_local_types(self, mod_ast, lookup_ast=None):
     dependencies = self._resolver.collect_dependencies(mod_ast)
@@ -415,6 +562,8 @@ class Loader:
       # Now that any imported TypeVar instances have been resolved, adjust type
       # parameters in classes and functions.
       module.ast = module.ast.Visit(visitors.AdjustTypeParameters())
+      # Share equal subtrees with the modules loaded so far.
+      module.ast = interning.InternTree(module.ast)
       # Now we can fill in internal cls pointers to ClassType nodes in the
       # module. This code executes when the module is first loaded, which
       # happens before any others use it to resolve dependencies, so there are
@@ -504,15 +653,19 @@ class Loader:
     module_map = self._modules.get_module_map()
     mod_name = lookup_ast and lookup_ast.name
     if mod_name and mod_name not in module_map:
-      module_map[mod_name] = lookup_ast
+      module_map = collections.ChainMap({mod_name: lookup_ast}, module_map)
     mod_ast = self._resolver.resolve_external_types(
         mod_ast, module_map, self._aliases[mod_name], mod_name=mod_name)
     return mod_ast
 
   def _resolve_classtype_pointers(self, mod_ast, *, lookup_ast=None):
-    module_map = self._modules.get_module_map()
-    module_map[""] = lookup_ast or mod_ast  # The module itself (local lookup)
-    mod_ast.Visit(visitors.FillInLocalPointers(module_map))
+    """Fill in ClassType pointers, returning the number of nodes visited."""
+    module_map = collections.ChainMap(
+        # The module itself (local lookup)
+        {"": lookup_ast or mod_ast}, self._modules.get_module_map())
+    filler = visitors.FillInLocalPointers(module_map)
+    mod_ast.Visit(filler)
+    return filler.num_class_types
 
   def resolve_pytd(self, pytd_node, lookup_ast):
     """Resolve and verify pytd value, using the given ast for local lookup."""
@@ -532,10 +685,15 @@ class Loader:
     return self.resolve_pytd(ast, ast)
 
   def _resolve_classtype_pointers_for_all_modules(self):
-    for module in self._modules.values():
-      if module.has_unresolved_pointers:
-        self._resolve_classtype_pointers(module.ast)
-        module.has_unresolved_pointers = False
+    # Only modules loaded since the last call need to be visited.
+    unresolved = self._modules.get_unresolved()
+    if not unresolved:
+      return
+    num_visited = 0
+    for name in unresolved:
+      num_visited += self._resolve_classtype_pointers(self._modules[name].ast)
+      self._modules.mark_resolved(name)
+    _classtype_nodes_metric.add(num_visited)
 
   def import_relative_name(self, name: str) -> Optional[_AST]:
     """IMPORT_NAME with level=-1. A name relative to the current directory."""
@@ -714,15 +872,16 @@ class PickledPyiLoader(Loader):
 
   @classmethod
   def load_from_pickle(cls, filename, options, missing_modules=()):
-    """Load a pytd module from a pickle file."""
-    items = pickle_utils.LoadPickle(filename, compress=True,
-                                    open_function=options.open_function)
-    modules = {
-        name: Module(name, filename=None, ast=None, pickle=pickle,
-                     has_unresolved_pointers=False)
-        for name, pickle in items
-    }
-    return cls(options, modules=modules, missing_modules=missing_modules)
+    """Load a pytd module from a snapshot written by save_to_pickle."""
+    version, items = pickle_utils.LoadSnapshot(
+        filename, open_function=options.open_function)
+    expected_version = _get_snapshot_version(options)
+    if version != expected_version:
+      raise utils.UsageError(
+          f"Precompiled builtins {filename} are for {version!r}, not "
+          f"{expected_version!r}. Regenerate them with --generate-builtins.")
+    _snapshot_modules_metric.inc(len(items))
+    return cls(options, missing_modules=missing_modules, pickled_modules=items)
 
   def load_module(self, mod_info, mod_ast=None):
     """Load (or retrieve from cache) a module and resolve its dependencies."""
@@ -6,11 +6,13 @@ import io
 import os
 import sys
 import textwrap
+from unittest import mock
 
 from pytype import config
 from pytype import file_utils
 from pytype import load_pytd
 from pytype import module_utils
+from pytype import utils
 from pytype.imports import pickle_utils
 from pytype.platform_utils import path_utils
 from pytype.pytd import pytd
@@ -401,6 +403,53 @@ class ImportPathsTest(_LoaderTest):
       self.assertEqual(module.filename, filename)
       self.assertEqual(module.ast, ast)
 
+  def test_resolve_only_new_modules(self):
+    with test_utils.Tempdir() as d:
+      d.create_file("foo.pyi", "class A: ...")
+      d.create_file("bar.pyi", """
+        import foo
+        class B(foo.A): ...
+      """)
+      loader = load_pytd.Loader(config.Options.create(
+          python_version=self.python_version, pythonpath=d.path))
+      loader.import_name("foo")
+      with mock.patch.object(
+          loader, "_resolve_classtype_pointers",
+          wraps=loader._resolve_classtype_pointers) as resolve:
+        bar = loader.import_name("bar")
+      self.assertEqual([call.args[0].name for call in resolve.call_args_list],
+                       ["bar"])
+      bar.Visit(visitors.VerifyLookup())
+
+  def test_module_map_is_live(self):
+    with test_utils.Tempdir() as d:
+      d.create_file("foo.pyi", "class A: ...")
+      loader = load_pytd.Loader(config.Options.create(
+          python_version=self.python_version, pythonpath=d.path))
+      module_map = loader._modules.get_module_map()
+      self.assertNotIn("foo", module_map)
+      foo = loader.import_name("foo")
+      self.assertIs(module_map["foo"], foo)
+      self.assertIn("foo", set(module_map))
+
+  def test_shared_subtrees(self):
+    with test_utils.Tempdir() as d:
+      d.create_file("foo.pyi", """
+        from typing import List
+        class A: ...
+        def f(x: List[A]) -> List[A]: ...
+        def g(x: List[A]) -> None: ...
+      """)
+      loader = load_pytd.Loader(config.Options.create(
+          python_version=self.python_version, pythonpath=d.path))
+      foo = loader.import_name("foo")
+      f_sig, = foo.Lookup("foo.f").signatures
+      g_sig, = foo.Lookup("foo.g").signatures
+      self.assertIs(f_sig.params[0], g_sig.params[0])
+      self.assertIs(f_sig.params[0].type, f_sig.return_type)
+      self.assertIs(f_sig.return_type.parameters[0].cls, foo.Lookup("foo.A"))
+      foo.Visit(visitors.VerifyLookup())
+
   def test_circular_import(self):
     with test_utils.Tempdir() as d:
       d.create_file(
@@ -838,6 +887,36 @@ class PickledPyiLoaderTest(test_base.UnitTest):
       self.assertTrue(loader.import_name("foo"))
       self.assertTrue(loader.import_name("ctypes"))
 
+  def test_pickled_builtins_loaded_on_demand(self):
+    with test_utils.Tempdir() as d:
+      filename = d.create_file("builtins.pickle")
+      loader = load_pytd.Loader(config.Options.create(
+          module_name="base", python_version=self.python_version))
+      loader.import_name("os")
+      loader.save_to_pickle(filename)
+      loader = load_pytd.PickledPyiLoader.load_from_pickle(
+          filename,
+          config.Options.create(
+              module_name="base",
+              python_version=self.python_version,
+              pythonpath=""))
+      self.assertNotIn("os", loader.get_resolved_modules())
+      self.assertTrue(loader.import_name("os"))
+      self.assertIn("os", loader.get_resolved_modules())
+
+  def test_pickled_builtins_version_mismatch(self):
+    with test_utils.Tempdir() as d:
+      filename = d.create_file("builtins.pickle")
+      load_pytd.Loader(config.Options.create(
+          module_name="base", python_version=self.python_version
+      )).save_to_pickle(filename)
+      other_version = (self.python_version[0], self.python_version[1] + 1)
+      with self.assertRaises(utils.UsageError):
+        load_pytd.PickledPyiLoader.load_from_pickle(
+            filename, config.Options.create(
+                module_name="base", python_version=other_version,
+                pythonpath=""))
+
 
 class MethodAliasTest(_LoaderTest):
 
@@ -92,6 +92,11 @@ def _prepare_for_test(enabled=True):
   _enabled = enabled
 
 
+def is_enabled():
+  """Returns whether metrics are being collected."""
+  return _enabled
+
+
 _platform_timer = time.time if os.name == "nt" else time.process_time
 
 
@@ -22,6 +22,7 @@ NO_NEXT = 512  # doesn't execute the following opcode
 STORE_JUMP = 1024  # only stores a jump, doesn't actually execute it
 PUSHES_BLOCK = 2048  # starts a block (while, try, finally, with, etc.)
 POPS_BLOCK = 4096  # ends a block
+IMPORTS = 8192  # imports a module or names from a module
 
 
 @attrs.define(slots=True)
@@ -145,6 +146,10 @@ class Opcode:
   def pops_block(cls):
     return bool(cls._FLAGS & POPS_BLOCK)
 
+  @classmethod
+  def is_import(cls):
+    return bool(cls._FLAGS & IMPORTS)
+
 
 class OpcodeWithArg(Opcode):
   """An opcode with one argument."""
@@ -407,6 +412,7 @@ class RETURN_VALUE(Opcode):
 
 
 class IMPORT_STAR(Opcode):
+  _FLAGS = IMPORTS
   __slots__ = ()
 
 
@@ -524,12 +530,12 @@ class COMPARE_OP(OpcodeWithArg):  # Arg: Comparison operator
 
 
 class IMPORT_NAME(OpcodeWithArg):  # Arg: Index in name list
-  _FLAGS = HAS_NAME|HAS_ARGUMENT|HAS_JUNKNOWN
+  _FLAGS = HAS_NAME|HAS_ARGUMENT|HAS_JUNKNOWN|IMPORTS
   __slots__ = ()
 
 
 class IMPORT_FROM(OpcodeWithArg):  # Arg: Index in name list
-  _FLAGS = HAS_NAME|HAS_ARGUMENT
+  _FLAGS = HAS_NAME|HAS_ARGUMENT|IMPORTS
   __slots__ = ()
 
 
@@ -73,6 +73,12 @@ class CommonTest(_TestBase):
   def test_for_iter(self):
     self.assertName([93, 0, 9], 'FOR_ITER')
 
+  def test_is_import(self):
+    self.assertTrue(opcodes.IMPORT_NAME.is_import())
+    self.assertTrue(opcodes.IMPORT_FROM.is_import())
+    self.assertTrue(opcodes.IMPORT_STAR.is_import())
+    self.assertFalse(opcodes.LOAD_NAME.is_import())
+
   def test_extended_disassembly(self):
     code = [
         0x7c, 0,  # 0 LOAD_FAST, arg=0,
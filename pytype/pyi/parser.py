@@ -854,6 +854,7 @@ _TOPLEVEL_PYI_OPTIONS = (
     "platform",
     "python_version",
     "strict_primitive_comparisons",
+    "stub_cache",
 )
 
 
@@ -864,6 +865,8 @@ class PyiOptions:
   python_version: Tuple[int, int] = sys.version_info[:2]
   platform: str = sys.platform
   strict_primitive_comparisons: bool = True
+  # A directory of parsed stubs, for loaders. See imports/stub_cache.py.
+  stub_cache: Optional[str] = None
 
   @classmethod
   def from_toplevel_options(cls, toplevel_options):
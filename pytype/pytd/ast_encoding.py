@@ -0,0 +1,267 @@
+"""A compact binary encoding of serialized pytd ASTs.
+
+Pickling a serialize_ast.SerializableAst stores every node as a separate object
+and rebuilds it through pickle's generic, recursive machinery. This encoding
+instead flattens the tree into a table of constants and a list of records:
+
+- Primitive values are stored once each in the table of constants. This is
+  mostly a string table: fully qualified names like "builtins.str" are repeated
+  throughout a module, but stored once. The strings are interned when decoded,
+  so equal names are the same object across all modules that are loaded.
+- Nodes, enum members and containers are stored as (tag, children) records,
+  where the children are indices into the constants followed by the records.
+  Records are in postorder, so a record only refers to values before it. The
+  tags, child counts and children are packed into arrays of the smallest
+  integer type that fits.
+- Structurally equal immutable nodes and tuples are stored once, and are shared
+  by the decoded tree. ClassType nodes with the same name are shared as well;
+  their cls pointers are not encoded.
+
+The constants and records are a single marshal payload. Encoding and decoding
+are iterative, so deep trees don't need a raised recursion limit."""
+
+import array
+import enum
+import hashlib
+import marshal
+import pickle
+import sys
+from typing import Any
+
+from pytype.pytd import pytd
+from pytype.pytd import serialize_ast
+from pytype.pytd.parse import node
+
+# Values stored in the constants table.
+_CONSTANT_TYPES = frozenset(
+    {str, int, float, complex, bool, bytes, type(None), type(Ellipsis)})
+
+# Changes whenever the layout of the payload changes.
+_FORMAT_VERSION = 2
+
+_MARSHAL_VERSION = 4
+
+# Array typecodes for record children, from smallest to largest.
+_INDEX_TYPECODES = ("B", "H", "I", "Q")
+
+
+class DecodeError(Exception):
+  """Raised when data is not a valid encoding for this version of pytype."""
+
+
+def _tuple(*args):
+  return args
+
+
+def _list(*args):
+  return list(args)
+
+
+def _set(*args):
+  return set(args)
+
+
+def _get_node_classes():
+  classes = (
+      v for v in vars(pytd).values()
+      if isinstance(v, type) and issubclass(v, node.Node) and
+      hasattr(v, "__attrs_attrs__"))
+  return sorted(classes, key=lambda cls: cls.__name__)
+
+
+def _get_enum_classes():
+  classes = (
+      v for v in vars(pytd).values()
+      if isinstance(v, type) and issubclass(v, enum.Enum) and
+      v.__module__ == pytd.__name__)
+  return sorted(classes, key=lambda cls: cls.__name__)
+
+
+_NODE_CLASSES = _get_node_classes()
+_ENUM_CLASSES = _get_enum_classes()
+
+# Record tags, as indices into _BUILDERS. Each builder is called with the
+# decoded children of a record.
+_TUPLE, _LIST, _SET, _PICKLED, _SERIALIZABLE_AST = range(5)
+_BUILDERS = (
+    (_tuple, _list, _set, pickle.loads, serialize_ast.SerializableAst) +
+    tuple(_NODE_CLASSES) + tuple(_ENUM_CLASSES))
+_TAGS = {cls: tag for tag, cls in enumerate(_BUILDERS)}
+
+
+def _get_schema_hash():
+  """Hash the node and enum definitions that the encoding depends on."""
+  schema = [_FORMAT_VERSION, serialize_ast.SerializableAst._fields]
+  for cls in _NODE_CLASSES:
+    schema.append((cls.__name__, [f.name for f in cls.__attrs_attrs__]))
+  for cls in _ENUM_CLASSES:
+    schema.append((cls.__name__, [(m.name, m.value) for m in cls]))
+  return hashlib.sha256(repr(schema).encode("utf-8")).digest()[:8]
+
+
+_HEADER = b"pytd-ast\0" + _get_schema_hash()
+
+
+def _get_typecode(max_value):
+  for typecode in _INDEX_TYPECODES:
+    if max_value < 1 << (8 * array.array(typecode).itemsize):
+      return typecode
+  raise ValueError(f"Too many values to encode: {max_value}")
+
+
+def _to_bytes(a):
+  if sys.byteorder != "little":
+    a.byteswap()
+  return a.tobytes()
+
+
+def _from_bytes(typecode, data):
+  a = array.array(typecode)
+  a.frombytes(data)
+  if sys.byteorder != "little":
+    a.byteswap()
+  return a
+
+
+class _Encoder:
+  """Flattens a value into constants and records."""
+
+  def __init__(self):
+    self._constants = {}
+    # Children are provisional references: ~i for constant i, and j for
+    # record j. They are renumbered once the number of constants is known.
+    self._records = []
+    self._shared_records = {}
+    # Objects that were already encoded, keyed by id. The objects themselves
+    # are kept alive so that their ids are not reused.
+    self._encoded = {}
+    self._objects = []
+
+  def _add_constant(self, value):
+    if type(value) is str:
+      # marshal records whether a string is interned, so intern all of them for
+      # a deterministic encoding. They are interned again when decoded.
+      value = sys.intern(value)
+    key = (type(value), value)
+    if key not in self._constants:
+      self._constants[key] = len(self._constants)
+    return ~self._constants[key]
+
+  def _expand(self, obj):
+    """Get an object's tag, children and whether it can be shared."""
+    cls = type(obj)
+    if cls is tuple:
+      return _TUPLE, obj, True
+    elif cls is list:
+      return _LIST, obj, False
+    elif cls is set:
+      # Sort for a deterministic encoding, if we can.
+      try:
+        return _SET, sorted(obj), False
+      except TypeError:
+        return _SET, list(obj), False
+    elif cls is serialize_ast.SerializableAst:
+      return _SERIALIZABLE_AST, obj, False
+    elif cls in _TAGS and issubclass(cls, enum.Enum):
+      return _TAGS[cls], (obj.value,), True
+    elif cls in _TAGS:
+      # Iterating over a node yields its fields. Modules compare by identity,
+      # so they are never shared.
+      return _TAGS[cls], tuple(obj), cls is not pytd.TypeDeclUnit
+    else:
+      return _PICKLED, (pickle.dumps(obj, pickle.HIGHEST_PROTOCOL),), False
+
+  def _add_record(self, record, shareable):
+    if shareable and record in self._shared_records:
+      return self._shared_records[record]
+    ref = len(self._records)
+    self._records.append(record)
+    if shareable:
+      self._shared_records[record] = ref
+    return ref
+
+  def encode(self, value) -> bytes:
+    """Encode a value."""
+    refs = []
+    # Entries are (object, None) for objects that have not been looked at yet,
+    # and (object, (tag, number of children, shareable)) for objects whose
+    # children have been pushed.
+    stack = [(value, None)]
+    while stack:
+      obj, expansion = stack.pop()
+      if expansion:
+        tag, num_children, shareable = expansion
+        start = len(refs) - num_children
+        children = tuple(refs[start:])
+        del refs[start:]
+        ref = self._add_record((tag, children), shareable)
+        self._encoded[id(obj)] = ref
+        self._objects.append(obj)
+        refs.append(ref)
+      elif type(obj) in _CONSTANT_TYPES:
+        refs.append(self._add_constant(obj))
+      elif id(obj) in self._encoded:
+        refs.append(self._encoded[id(obj)])
+      else:
+        tag, children, shareable = self._expand(obj)
+        stack.append((obj, (tag, len(children), shareable)))
+        stack.extend((child, None) for child in reversed(children))
+    root, = refs
+    num_constants = len(self._constants)
+    def renumber(ref):
+      return ~ref if ref < 0 else num_constants + ref
+    constants = tuple(value for _, value in self._constants)
+    tags = array.array("B", (tag for tag, _ in self._records))
+    counts = [len(children) for _, children in self._records]
+    children = [renumber(child)
+                for _, record_children in self._records
+                for child in record_children]
+    typecode = _get_typecode(max(counts + children + [0]))
+    return _HEADER + marshal.dumps(
+        (constants, tags.tobytes(), typecode,
+         _to_bytes(array.array(typecode, counts)),
+         _to_bytes(array.array(typecode, children)), renumber(root)),
+        _MARSHAL_VERSION)
+
+
+def IsEncoded(data) -> bool:
+  """Whether data, as bytes or a memoryview, starts with our header."""
+  return bytes(data[:len(_HEADER)]) == _HEADER
+
+
+def EncodeAst(serializable_ast: serialize_ast.SerializableAst) -> bytes:
+  """Encode a serialize_ast.SerializableAst."""
+  return _Encoder().encode(serializable_ast)
+
+
+def DecodeAst(data) -> Any:
+  """Decode the output of EncodeAst.
+
+  Args:
+    data: The encoding, as bytes or a memoryview.
+
+  Returns:
+    The serialize_ast.SerializableAst.
+
+  Raises:
+    DecodeError: If the data is not a valid encoding for this version of pytype.
+  """
+  if not IsEncoded(data):
+    raise DecodeError("Not an encoded ast, or encoded by another pytype version")
+  try:
+    constants, tags, typecode, counts, children, root = marshal.loads(
+        data[len(_HEADER):])
+    counts = _from_bytes(typecode, counts)
+    children = _from_bytes(typecode, children).tolist()
+    objects = list(constants)
+    get = objects.__getitem__
+    append = objects.append
+    builders = _BUILDERS
+    start = 0
+    for tag, count in zip(tags, counts):
+      end = start + count
+      append(builders[tag](*map(get, children[start:end])))
+      start = end
+    return objects[root]
+  except Exception as e:  # pylint: disable=broad-except
+    raise DecodeError(f"Corrupt encoded ast: {e}") from e
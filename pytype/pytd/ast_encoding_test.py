@@ -0,0 +1,148 @@
+"""Tests for ast_encoding.py."""
+
+import pickle
+
+from pytype import config
+from pytype import load_pytd
+from pytype.pytd import ast_encoding
+from pytype.pytd import pytd
+from pytype.pytd import pytd_utils
+from pytype.pytd import serialize_ast
+from pytype.pytd import visitors
+from pytype.tests import test_base
+
+import unittest
+
+
+class AstEncodingTest(test_base.UnitTest):
+  """Test EncodeAst and DecodeAst."""
+
+  def _serialize(self, module_name):
+    loader = load_pytd.Loader(config.Options.create(
+        python_version=self.python_version))
+    # SerializeAst clears class pointers in place, so work on a copy of the
+    # loader's (possibly shared) module.
+    ast = pickle.loads(pickle.dumps(loader.import_name(module_name)))
+    return serialize_ast.SerializeAst(ast)
+
+  def _round_trip(self, serializable_ast):
+    return ast_encoding.DecodeAst(ast_encoding.EncodeAst(serializable_ast))
+
+  def test_matches_pickle(self):
+    for module_name in ("builtins", "collections", "os", "typing"):
+      with self.subTest(module_name=module_name):
+        serializable_ast = self._serialize(module_name)
+        pickled = pickle.loads(pickle.dumps(serializable_ast))
+        decoded = self._round_trip(serializable_ast)
+        self.assertEqual(decoded.ast.name, pickled.ast.name)
+        self.assertTrue(pytd_utils.ASTeq(decoded.ast, pickled.ast))
+        self.assertMultiLineEqual(pytd_utils.Print(decoded.ast),
+                                  pytd_utils.Print(pickled.ast))
+        self.assertEqual(decoded.dependencies, pickled.dependencies)
+        self.assertEqual(decoded.late_dependencies, pickled.late_dependencies)
+        self.assertEqual(decoded.class_type_nodes, pickled.class_type_nodes)
+        self.assertEqual(decoded.src_path, pickled.src_path)
+        self.assertEqual(decoded.metadata, pickled.metadata)
+
+  def test_class_type_nodes_are_in_tree(self):
+    decoded = self._round_trip(self._serialize("collections"))
+    collector = serialize_ast.FindClassTypesVisitor()
+    decoded.ast.Visit(collector)
+    self.assertEqual({id(n) for n in decoded.class_type_nodes},
+                     {id(n) for n in collector.class_type_nodes})
+
+  def test_process_ast(self):
+    serializable_ast = self._serialize("collections")
+    loader = load_pytd.Loader(config.Options.create(
+        python_version=self.python_version))
+    module_map = {name: loader.import_name(name)
+                  for name, _ in serializable_ast.dependencies
+                  if name != "collections"}
+    ast = serialize_ast.ProcessAst(self._round_trip(serializable_ast),
+                                   module_map)
+    ast.Visit(visitors.VerifyLookup())
+
+  def test_deterministic(self):
+    serializable_ast = self._serialize("os")
+    self.assertEqual(ast_encoding.EncodeAst(serializable_ast),
+                     ast_encoding.EncodeAst(
+                         pickle.loads(pickle.dumps(serializable_ast))))
+
+  def test_smaller_than_pickle(self):
+    serializable_ast = self._serialize("builtins")
+    self.assertLess(len(ast_encoding.EncodeAst(serializable_ast)),
+                    len(pickle.dumps(serializable_ast,
+                                     pickle.HIGHEST_PROTOCOL)))
+
+  def test_shares_equal_nodes(self):
+    t1 = pytd.GenericType(pytd.ClassType("builtins.list"),
+                          (pytd.ClassType("builtins.int"),))
+    t2 = pytd.GenericType(pytd.ClassType("builtins.list"),
+                          (pytd.ClassType("builtins.int"),))
+    ast = pytd_utils.CreateModule("foo", constants=(
+        pytd.Constant("foo.x", t1), pytd.Constant("foo.y", t2)))
+    decoded = self._round_trip(serialize_ast.SerializableAst(
+        ast, [], [], None, None, []))
+    x, y = decoded.ast.constants
+    self.assertEqual(x.type, t1)
+    self.assertIs(x.type, y.type)
+
+  def test_strings_stored_once(self):
+    ast = pytd_utils.CreateModule("foo", constants=tuple(
+        pytd.Constant(f"foo.x{i}", pytd.GenericType(
+            pytd.ClassType("builtins.list"), (pytd.ClassType("builtins.str"),)))
+        for i in range(10)))
+    data = ast_encoding.EncodeAst(serialize_ast.SerializableAst(
+        ast, [], [], None, None, []))
+    self.assertEqual(data.count(b"builtins.str"), 1)
+
+  def test_names_shared_across_modules(self):
+    def decode(module_name):
+      # Build the name at runtime so that it is not a compile-time constant.
+      cls_name = ".".join(["builtins", "str"])
+      ast = pytd_utils.CreateModule(module_name, constants=(
+          pytd.Constant(f"{module_name}.x", pytd.ClassType(cls_name)),))
+      return self._round_trip(serialize_ast.SerializableAst(
+          ast, [], [], None, None, []))
+    x1, = decode("foo").ast.constants
+    x2, = decode("bar").ast.constants
+    self.assertIsNot(x1, x2)
+    self.assertIs(x1.type.name, x2.type.name)
+
+  def test_deep_tree(self):
+    t = pytd.ClassType("builtins.int")
+    for _ in range(10000):
+      t = pytd.GenericType(pytd.ClassType("builtins.list"), (t,))
+    ast = pytd_utils.CreateModule("foo", constants=(pytd.Constant("foo.x", t),))
+    decoded = self._round_trip(serialize_ast.SerializableAst(
+        ast, [], [], None, None, []))
+    depth = 0
+    t = decoded.ast.constants[0].type
+    while isinstance(t, pytd.GenericType):
+      t, = t.parameters
+      depth += 1
+    self.assertEqual(depth, 10000)
+    self.assertEqual(t, pytd.ClassType("builtins.int"))
+
+  def test_other_values(self):
+    value = [1, 2.5, b"x", None, frozenset({"a"}), {"b": 3}]
+    ast = pytd_utils.CreateModule("foo", constants=(
+        pytd.Constant("foo.x", pytd.AnythingType(), value),))
+    decoded = self._round_trip(serialize_ast.SerializableAst(
+        ast, [("bar", {"y", "x"})], [], None, "foo.py", ["meta"]))
+    self.assertEqual(decoded.ast.constants[0].value, value)
+    self.assertEqual(decoded.dependencies, [("bar", {"x", "y"})])
+    self.assertEqual(decoded.src_path, "foo.py")
+    self.assertEqual(decoded.metadata, ["meta"])
+
+  def test_decode_error(self):
+    for data in (b"", pickle.dumps(1), ast_encoding.EncodeAst(
+        serialize_ast.SerializableAst(pytd_utils.CreateModule("foo"), [], [],
+                                      None, None, []))[:-1]):
+      with self.subTest(data=data):
+        with self.assertRaises(ast_encoding.DecodeError):
+          ast_encoding.DecodeAst(data)
+
+
+if __name__ == "__main__":
+  unittest.main()
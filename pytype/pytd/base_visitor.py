@@ -106,6 +106,10 @@ class Visitor:
   Each class inheriting from visitor SHOULD have a fixed set of methods,
   otherwise it might break the caching in this class.
 
+  Node.Visit only creates a new node if one of the node's children changed.
+  Otherwise, the Visit function gets the original node, and if it returns it
+  unchanged, so does Node.Visit.
+
   Attributes:
     visits_all_node_types: Whether the visitor can visit every node type.
     unchecked_node_names: Contains the names of node classes that are unchecked
@@ -122,6 +126,20 @@ class Visitor:
       constructed based on the enter/visit/leave functions and precondition
       data about legal ASTs.  As an optimization, the visitor will only visit
       nodes under which some actionable node can appear.
+    fusable: Whether Node.VisitAll may apply this visitor in the same traversal
+      as other fusable visitors. Only set this if the visitor has no Enter or
+      Leave functions, and its Visit functions return the same result for the
+      same node every time, regardless of where the node is in the tree.
+    iterative: Whether Node.Visit keeps the nodes it is visiting on an explicit
+      stack instead of recursing. The explicit stack is faster, and the depth
+      of the trees that can be visited isn't limited by the recursion limit.
+      Set this to False to get tracebacks that show the path to the node being
+      visited.
+    collector: Whether this visitor only collects information, and never
+      changes the tree. Node.Visit then walks the tree without rebuilding any
+      nodes: Visit functions are called with the original nodes and their
+      results are ignored, except that the result for the root node is
+      returned. Visitors without Visit functions are always collectors.
   """
   # The old_node attribute contains a copy of the node before its children were
   # visited. It has the same type as the node currently being visited.
@@ -129,6 +147,9 @@ class Visitor:
 
   visits_all_node_types = False
   unchecked_node_names = set()
+  fusable = False
+  iterative = True
+  collector = False
 
   _visitor_functions_cache = {}
 
@@ -194,6 +215,9 @@ class Visitor:
     self.visit_functions = visit_fns
     self.leave_functions = leave_fns
     self.visit_class_names = visit_class_names
+    # The generic Visit method is registered under "".
+    if not self.visits_all_node_types and set(visit_fns) <= {""}:
+      self.collector = True
 
   def Enter(self, node, *args, **kwargs):
     return self.enter_functions[node.__class__.__name__](
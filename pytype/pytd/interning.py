@@ -0,0 +1,131 @@
+"""Hash-consing of pytd nodes.
+
+pytd nodes are immutable, but equal subtrees are allocated separately wherever
+they appear: every signature that takes a str has its own
+`Parameter("x", ClassType("builtins.str"), ...)`. InternTree rebuilds a tree
+bottom-up, replacing each node with an equal node that was interned earlier, if
+there is one. Equal subtrees then share memory, and comparing them is fast,
+since tuple comparison checks identity before equality.
+
+Nodes are looked up in an InternTable by their class and fields, with child
+nodes compared by identity. Since children are interned before their parents,
+this finds every equal subtree.
+
+By default, nodes are only shared within the tree being interned. A table can be
+passed in to share nodes across trees as well, but its entries cost about as
+much memory as sharing saves, because most repeated subtrees are repeated
+within a module rather than across modules.
+
+ClassType nodes are mutable: their cls pointers are filled in and cleared in
+place, one module at a time. They are therefore only shared within the tree
+being interned, and only if they point to the same class.
+"""
+
+import weakref
+
+from pytype import metrics
+from pytype.pytd import base_visitor
+from pytype.pytd import pytd
+from pytype.pytd.parse import node
+
+_shared_nodes_metric = metrics.Counter("interned_pytd_nodes_shared")
+
+
+def _Key(values):
+  """Get a lookup key for a sequence of values, comparing nodes by identity."""
+  key = []
+  for value in values:
+    value_class = value.__class__
+    if value_class is str or value is None:
+      key.append(value)
+    elif value_class is tuple:
+      key.append(_Key(value))
+    elif isinstance(value, node.Node):
+      key.append(id(value))
+    else:
+      # Include the class, so that e.g. Literal(True) and Literal(1) differ,
+      # and so that ints don't look like node ids.
+      hash(value)  # Raises TypeError for unhashable values.
+      key.append((value_class, value))
+  return tuple(key)
+
+
+class InternTable:
+  """A table of interned pytd nodes."""
+
+  def __init__(self, weak=True):
+    """Initialize.
+
+    Args:
+      weak: Whether to hold the nodes weakly. Tables that don't outlive the
+        trees they intern don't need to, and are faster without.
+    """
+    self._nodes = weakref.WeakValueDictionary() if weak else {}
+
+  def __len__(self):
+    return len(self._nodes)
+
+  def Intern(self, n):
+    """Get the interned node equal to n, interning n if there is none.
+
+    The children of n should have been interned already, since they are
+    compared by identity.
+
+    Args:
+      n: A node.
+
+    Returns:
+      A node equal to n.
+    """
+    try:
+      key = (n.__class__, _Key(n))
+    except TypeError:
+      # Some field has an unhashable value.
+      return n
+    interned = self._nodes.setdefault(key, n)
+    # The key holds ids of the children, which n keeps alive as long as the
+    # entry exists.
+    return interned
+
+
+class _InternVisitor(base_visitor.Visitor):
+  """Replaces nodes with their interned versions."""
+
+  visits_all_node_types = True
+
+  def __init__(self, table):
+    super().__init__()
+    self._table = table
+    # ClassType nodes in this tree, keyed by name and cls pointer.
+    self._class_types = {}
+    self.num_shared = 0
+
+  def Visit(self, n):  # pytype: disable=signature-mismatch
+    node_class = n.__class__
+    if node_class is pytd.ClassType:
+      interned = self._class_types.setdefault((n.name, id(n.cls)), n)
+    elif node_class is pytd.TypeDeclUnit:
+      # Modules compare by identity, and have lookup caches.
+      return n
+    else:
+      interned = self._table.Intern(n)
+    if interned is not n:
+      self.num_shared += 1
+    return interned
+
+
+def InternTree(tree, table=None):
+  """Replace the subtrees of a tree with equal, interned ones.
+
+  Args:
+    tree: A pytd node.
+    table: Optionally, an InternTable, to share nodes with other trees interned
+      with the same table.
+
+  Returns:
+    A tree equal to the given one.
+  """
+  visitor = _InternVisitor(InternTable(weak=False) if table is None else table)
+  tree = tree.Visit(visitor)
+  _shared_nodes_metric.inc(visitor.num_shared)
+  return tree
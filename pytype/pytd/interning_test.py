@@ -0,0 +1,89 @@
+"""Tests for interning.py."""
+
+import gc
+
+from pytype.pytd import interning
+from pytype.pytd import pytd
+from pytype.pytd import pytd_utils
+from pytype.pytd.parse import parser_test_base
+
+import unittest
+
+
+class InternTreeTest(parser_test_base.ParserTest):
+  """Tests for InternTree."""
+
+  SRC = """
+    from typing import List, Union
+    def f(x: List[int], y: Union[int, str]) -> List[int]: ...
+    def g(x: List[int], y: Union[str, int]) -> None: ...
+    class A:
+      def f(self, x: List[int], y: Union[int, str]) -> List[int]: ...
+  """
+
+  def test_equal_tree(self):
+    ast = self.Parse(self.SRC)
+    interned = interning.InternTree(ast)
+    self.assertMultiLineEqual(pytd_utils.Print(interned), pytd_utils.Print(ast))
+
+  def test_shares_equal_subtrees(self):
+    ast = interning.InternTree(self.Parse(self.SRC))
+    f = ast.Lookup("f").signatures[0]
+    g = ast.Lookup("g").signatures[0]
+    method = ast.Lookup("A").Lookup("f").signatures[0]
+    self.assertIs(f.params[0], g.params[0])
+    self.assertIs(f.params[0].type, f.return_type)
+    self.assertIs(f.params[1], method.params[2])
+
+  def test_union_order(self):
+    ast = interning.InternTree(self.Parse(self.SRC))
+    f_y = ast.Lookup("f").signatures[0].params[1]
+    g_y = ast.Lookup("g").signatures[0].params[1]
+    self.assertEqual(f_y, g_y)
+    self.assertIsNot(f_y, g_y)
+    self.assertEqual(pytd_utils.Print(g_y.type), "Union[str, int]")
+
+  def test_value_classes(self):
+    ast = pytd_utils.CreateModule("foo", constants=(
+        pytd.Constant("foo.x", pytd.Literal(True)),
+        pytd.Constant("foo.y", pytd.Literal(1)),
+        pytd.Constant("foo.z", pytd.AnythingType(), [1]),
+    ))
+    x, y, z = interning.InternTree(ast).constants
+    self.assertIsNot(x.type, y.type)
+    self.assertIs(x.type.value, True)
+    self.assertEqual(z.value, [1])
+
+  def test_class_types(self):
+    cls1 = pytd.Class("foo.A", (), (), (), (), (), (), None, ())
+    cls2 = pytd.Class("bar.A", (), (), (), (), (), (), None, ())
+    def make_ast():
+      return pytd_utils.CreateModule("foo", constants=(
+          pytd.Constant("foo.x", pytd.ClassType("foo.A", cls1)),
+          pytd.Constant("foo.y", pytd.ClassType("foo.A", cls1)),
+          pytd.Constant("foo.z", pytd.ClassType("foo.A", cls2)),
+      ))
+    x, y, z = interning.InternTree(make_ast()).constants
+    self.assertIs(x.type, y.type)
+    self.assertIsNot(x.type, z.type)
+    self.assertIs(z.type.cls, cls2)
+    # ClassType nodes are only shared within a tree.
+    table = interning.InternTable()
+    ast1 = interning.InternTree(make_ast(), table)
+    ast2 = interning.InternTree(make_ast(), table)
+    self.assertIsNot(ast1.constants[0], ast2.constants[0])
+
+  def test_table(self):
+    table = interning.InternTable()
+    ast1 = interning.InternTree(self.Parse(self.SRC), table)
+    ast2 = interning.InternTree(self.Parse(self.SRC), table)
+    self.assertIs(ast1.Lookup("f"), ast2.Lookup("f"))
+    self.assertIsNot(ast1, ast2)
+    self.assertTrue(len(table))
+    del ast1, ast2
+    gc.collect()
+    self.assertFalse(len(table))
+
+
+if __name__ == "__main__":
+  unittest.main()
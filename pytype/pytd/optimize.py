@@ -8,6 +8,7 @@
 
 import collections
 import logging
+import weakref
 
 from pytype import utils
 from pytype.pytd import abc_hierarchy
@@ -85,6 +86,8 @@ class RemoveDuplicates(visitors.Visitor):
   existing one.
   """
 
+  fusable = True
+
   def VisitFunction(self, node):
     # We remove duplicates, but keep existing entries in the same order.
     return node.Replace(
@@ -104,6 +107,8 @@ class SimplifyUnions(visitors.Visitor):
     c: Union[int, float]
   """
 
+  fusable = True
+
   def VisitUnionType(self, union):
     return pytd_utils.JoinTypes(union.type_list)
 
@@ -148,6 +153,8 @@ class CombineReturnsAndExceptions(visitors.Visitor):
       raise OverflowError()
   """
 
+  fusable = True
+
   def _GroupByArguments(self, signatures):
     """Groups signatures by arguments.
 
@@ -206,6 +213,8 @@ class CombineContainers(visitors.Visitor):
   .
   """
 
+  fusable = True
+
   _CONTAINER_NAMES = {
       pytd.TupleType: ("builtins.tuple", "typing.Tuple"),
       pytd.CallableType: ("typing.Callable",),
@@ -313,6 +322,9 @@ class SuperClassHierarchy:
   def __init__(self, superclasses):
     self._superclasses = superclasses
     self._subclasses = utils.invert_dict(self._superclasses)
+    # Type names are numbered, so that sets of names can be stored as bitsets.
+    self._bits = {}
+    self._ancestor_bits = {}
 
   def GetSuperClasses(self):
     return self._superclasses
@@ -362,6 +374,48 @@ class SuperClassHierarchy:
         queue.extend(self._subclasses[item])
     return seen
 
+  def GetBit(self, type_name):
+    """Get the bit that represents a type name in bitsets of type names."""
+    bit = self._bits.get(type_name)
+    if bit is None:
+      bit = self._bits[type_name] = 1 << len(self._bits)
+    return bit
+
+  def GetAncestorBits(self, type_name):
+    """Get the bitset of a type name and all its (known) superclasses.
+
+    This is ExpandSuperClasses(type_name) as a bitset of GetBit() values, which
+    is much faster to intersect and union than a set of names.
+
+    Arguments:
+      type_name: A type name. E.g. "int".
+
+    Returns:
+      An int, the bitwise or of the bits of the type and its superclasses.
+    """
+    bits = self._ancestor_bits.get(type_name)
+    if bits is not None:
+      return bits
+    # Compute the bitsets of the superclasses first, without recursing, since
+    # hierarchies can be deep.
+    stack = [type_name]
+    while stack:
+      name = stack[-1]
+      if name in self._ancestor_bits:
+        stack.pop()
+        continue
+      superclasses = self._superclasses.get(name, ())
+      missing = [s for s in superclasses if s not in self._ancestor_bits]
+      if missing:
+        stack.extend(missing)
+        continue
+      stack.pop()
+      bits = self.GetBit(name)
+      for superclass in superclasses:
+        bits |= self._ancestor_bits[superclass]
+      self._ancestor_bits[name] = bits
+    return self._ancestor_bits[type_name]
+
   def HasSubClassInSet(self, cls, known):
     """Queries whether a subclass of a type is present in a given set."""
     return any(sub in known
@@ -386,19 +440,34 @@ class SimplifyUnionsWithSuperclasses(visitors.Visitor):
    A union B = A, if B is a subset of A.)
   """
 
+  fusable = True
+
   def __init__(self, hierarchy):
     super().__init__()
     self.hierarchy = hierarchy
 
   def VisitUnionType(self, union):
-    c = collections.Counter()
+    # A type is redundant if it is a subclass of another type in the union, or
+    # if several distinct types in the union have its name. Comparing every pair
+    # of types is quadratic in the length of the union, so instead we collect
+    # the names of the types as a bitset, and intersect that with each type's
+    # superclasses.
+    present = 0  # The names of the types in the union.
+    repeated = 0  # The names of several distinct types in the union.
     for t in set(union.type_list):
       if isinstance(t, pytd.GENERIC_BASE_TYPE):
-        c += collections.Counter(self.hierarchy.ExpandSubClasses(str(t)))
-    # Below, c[str[t]] can be zero - that's the default for non-existent items
-    # in collections.Counter. It'll happen for types that are not
-    # instances of GENERIC_BASE_TYPE, like container types.
-    new_type_list = [t for t in union.type_list if c[str(t)] <= 1]
+        bit = self.hierarchy.GetBit(str(t))
+        if present & bit:
+          repeated |= bit
+        present |= bit
+    new_type_list = []
+    for t in union.type_list:
+      # Types that are not instances of GENERIC_BASE_TYPE, like container types,
+      # are only redundant if some class has the same name.
+      bits = self.hierarchy.GetAncestorBits(str(t)) & present
+      if not bits or (not bits & (bits - 1) and not bits & repeated):
+        # At most one type in the union is t or a superclass of t.
+        new_type_list.append(t)
     return pytd_utils.JoinTypes(new_type_list)
 
 
@@ -411,6 +480,8 @@ class FindCommonSuperClasses(visitors.Visitor):
     def f(x: Sequence, y: Set) -> Real
   """
 
+  fusable = True
+
   def __init__(self, hierarchy):
     super().__init__()
     self.hierarchy = hierarchy
@@ -461,6 +532,8 @@ class CollapseLongUnions(visitors.Visitor):
       more types than this, it is shortened.
   """
 
+  fusable = True
+
   def __init__(self, max_length: int = 7):
     super().__init__()
     self.generic_type = pytd.AnythingType()
@@ -493,6 +566,8 @@ class AdjustGenericType(visitors.Visitor):
 class AdjustReturnAndConstantGenericType(visitors.Visitor):
   """Changes "object" to "Any" in return and constant types."""
 
+  fusable = True
+
   def VisitSignature(self, sig):
     return sig.Replace(return_type=sig.return_type.Visit(AdjustGenericType()))
 
@@ -680,6 +755,8 @@ class AbsorbMutableParameters(visitors.Visitor):
   "self". The resulting AST is temporary and needs careful handling.
   """
 
+  fusable = True
+
   def VisitParameter(self, p):
     if p.mutated_type is None:
       return p
@@ -700,6 +777,8 @@ class SimplifyContainers(visitors.Visitor):
   the parameters are all Any.
   """
 
+  fusable = True
+
   def _Simplify(self, t):
     if all(isinstance(p, pytd.AnythingType) for p in t.parameters):
       return t.base_type
@@ -842,6 +921,30 @@ class MergeTypeParameters(TypeParameterScope):
           visitors.ReplaceTypeParameters(substitutions)).Visit(SimplifyUnions())
 
 
+# Superclasses of the classes in the builtins ASTs passed to Optimize, keyed by
+# AST. Builtins are usually loaded once per process, so we only need to extract
+# them once.
+_builtins_superclasses = weakref.WeakKeyDictionary()
+
+
+def _GetBuiltinsSuperClasses(builtins):
+  """Get the superclasses of the classes in builtins.
+
+  Arguments:
+    builtins: A pytd.TypeDeclUnit.
+
+  Returns:
+    A dictionary mapping class names to lists of superclass names. It is shared
+    between calls with the same builtins, so it must not be modified.
+  """
+  try:
+    return _builtins_superclasses[builtins]
+  except KeyError:
+    superclasses = builtins.Visit(visitors.ExtractSuperClassesByName())
+    _builtins_superclasses[builtins] = superclasses
+    return superclasses
+
+
 def Optimize(node,
              builtins=None,
              lossy=False,
@@ -871,30 +974,36 @@ def Optimize(node,
   Returns:
     An optimized node.
   """
-  node = node.Visit(NormalizeGenericSelfTypes())
-  node = node.Visit(RemoveDuplicates())
-  node = node.Visit(SimplifyUnions())
-  node = node.Visit(CombineReturnsAndExceptions())
-  node = node.Visit(CombineContainers())
-  node = node.Visit(SimplifyContainers())
+  node = node.VisitAll([
+      NormalizeGenericSelfTypes(),
+      RemoveDuplicates(),
+      SimplifyUnions(),
+      CombineReturnsAndExceptions(),
+      CombineContainers(),
+      SimplifyContainers(),
+  ])
+  passes = []
   if builtins:
-    superclasses = builtins.Visit(visitors.ExtractSuperClassesByName())
+    superclasses = dict(_GetBuiltinsSuperClasses(builtins))
     superclasses.update(node.Visit(visitors.ExtractSuperClassesByName()))
     if use_abcs:
       superclasses.update(abc_hierarchy.GetSuperClasses())
     hierarchy = SuperClassHierarchy(superclasses)
-    node = node.Visit(SimplifyUnionsWithSuperclasses(hierarchy))
+    passes.append(SimplifyUnionsWithSuperclasses(hierarchy))
     if lossy:
-      node = node.Visit(FindCommonSuperClasses(hierarchy))
+      passes.append(FindCommonSuperClasses(hierarchy))
   if max_union:
-    node = node.Visit(CollapseLongUnions(max_union))
-  node = node.Visit(AdjustReturnAndConstantGenericType())
+    passes.append(CollapseLongUnions(max_union))
+  passes.append(AdjustReturnAndConstantGenericType())
   if remove_mutable:
-    node = node.Visit(AbsorbMutableParameters())
-    node = node.Visit(CombineContainers())
-    node = node.Visit(MergeTypeParameters())
-    node = node.Visit(visitors.AdjustSelf())
-  node = node.Visit(SimplifyContainers())
+    passes.extend([
+        AbsorbMutableParameters(),
+        CombineContainers(),
+        MergeTypeParameters(),
+        visitors.AdjustSelf(),
+    ])
+  passes.append(SimplifyContainers())
+  node = node.VisitAll(passes)
   if builtins and can_do_lookup:
     node = visitors.LookupClasses(node, builtins, ignore_late_types=True)
   return node
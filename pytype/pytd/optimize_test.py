@@ -1,5 +1,6 @@
 import re
 import textwrap
+from unittest import mock
 
 from pytype import config
 from pytype import load_pytd
@@ -321,6 +322,75 @@ class TestOptimize(parser_test_base.ParserTest):
     ast = ast.Visit(visitor)
     self.AssertSourceEquals(ast, expected)
 
+  def test_simplify_wide_unions_with_superclasses(self):
+    # C{i} is a subclass of C{i // 2}, so C0 is the root of a binary tree.
+    hierarchy = optimize.SuperClassHierarchy(
+        {f"C{i}": [f"C{i // 2}"] for i in range(1, 500)})
+    visitor = optimize.SimplifyUnionsWithSuperclasses(hierarchy)
+    def simplify(names):
+      union = pytd.UnionType(tuple(pytd.NamedType(n) for n in names))
+      return union.Visit(visitor)
+    self.assertEqual(simplify(f"C{i}" for i in range(500)),
+                     pytd.NamedType("C0"))
+    leaves = [f"C{i}" for i in range(250, 500)]
+    self.assertEqual(simplify(leaves), simplify(leaves + leaves))
+    self.assertEqual(len(simplify(leaves).type_list), 250)
+    expected = [n for n in leaves
+                if "C3" not in hierarchy.ExpandSuperClasses(n)]
+    self.assertEqual(simplify(leaves + ["C3"]),
+                     pytd.UnionType(tuple(pytd.NamedType(n)
+                                          for n in expected + ["C3"])))
+
+  def test_simplify_unions_with_superclasses_same_name(self):
+    # Distinct types with the same name are all removed.
+    visitor = optimize.SimplifyUnionsWithSuperclasses(
+        optimize.SuperClassHierarchy({"B": ["A"]}))
+    union = pytd.UnionType((pytd.NamedType("A"), pytd.ClassType("A"),
+                            pytd.NamedType("C")))
+    self.assertEqual(union.Visit(visitor), pytd.NamedType("C"))
+    union = pytd.UnionType((pytd.NamedType("B"), pytd.ClassType("A"),
+                            pytd.NamedType("C")))
+    self.assertEqual(union.Visit(visitor),
+                     pytd.UnionType((pytd.ClassType("A"), pytd.NamedType("C"))))
+
+  def test_ancestor_bits(self):
+    superclasses = self.builtins.Visit(visitors.ExtractSuperClassesByName())
+    hierarchy = optimize.SuperClassHierarchy(superclasses)
+    for name in list(superclasses)[:100] + ["builtins.bool", "unknown"]:
+      with self.subTest(name=name):
+        expected = 0
+        for superclass in hierarchy.ExpandSuperClasses(name):
+          expected |= hierarchy.GetBit(superclass)
+        self.assertEqual(hierarchy.GetAncestorBits(name), expected)
+
+  def test_builtins_superclasses_are_cached(self):
+    src = pytd_src("""
+        x = ...  # type: Union[int, bool]
+    """)
+    self.Optimize(self.ParseAndResolve(src))
+    with mock.patch.object(visitors, "ExtractSuperClassesByName",
+                           wraps=visitors.ExtractSuperClassesByName) as extract:
+      optimized = self.Optimize(self.ParseAndResolve(src), lossy=False)
+    # Only the optimized module is visited.
+    self.assertEqual(extract.call_count, 1)
+    self.assertEqual(pytd_utils.Print(optimized.Lookup("x").type), "int")
+
+  def test_builtins_superclasses_depend_on_builtins(self):
+    src = pytd_src("""
+        x = ...  # type: Union[int, bool]
+    """)
+    builtins = self.Parse("""
+        class object: ...
+        class int(object): ...
+        class bool(object): ...
+    """, name="builtins")
+    for b, expected in ((self.builtins, "int"), (builtins, "Union[int, bool]")):
+      with self.subTest(expected=expected):
+        optimized = optimize.Optimize(self.ParseAndResolve(src), b,
+                                      can_do_lookup=False)
+        self.assertEqual(pytd_utils.Print(optimized.Lookup("x").type),
+                         expected)
+
   @unittest.skip("Needs better handling of GenericType")
   def test_simplify_unions_with_superclasses_generic(self):
     src = pytd_src("""
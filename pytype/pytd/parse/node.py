@@ -12,6 +12,7 @@ documentation in the various visitor methods below for details.
 For examples of visitors, see pytd/visitors.py
 """
 
+import operator
 from typing import Any, Dict, Optional
 
 import attrs
@@ -27,6 +28,10 @@ class Node:
   _name2item: Dict[str, Any]  # Lookup cache used by module and class nodes
   name: Optional[str]
 
+  # The fields that the lookup cache is built from. Replace() keeps the cache
+  # if none of them change.
+  _lookup_fields = frozenset()
+
   def PopulateLookupCache(self, *members):
     # Instances are typically frozen attrs
     object.__setattr__(self, "_name2item", {})
@@ -99,13 +104,54 @@ class Node:
     """
     return _Visit(self, visitor, *args, **kwargs)
 
+  def VisitAll(self, visitors):
+    """Transform this tree with each of the visitors in turn.
+
+    The result is the same as that of calling Visit with each visitor, but
+    consecutive visitors that are marked as fusable are applied in a single
+    traversal of the tree.
+
+    Arguments:
+      visitors: A sequence of visitors.
+
+    Returns:
+      Transformed version of this node.
+    """
+    node = self
+    group = []
+    for visitor in list(visitors) + [None]:
+      if visitor is not None and visitor.fusable:
+        # The generic Enter and Leave methods are registered under "".
+        assert set(visitor.enter_functions) | set(visitor.leave_functions) <= {
+            ""}, (f"{type(visitor).__name__} has Enter or Leave functions, so "
+                  "it can't be fused")
+        group.append(visitor)
+        continue
+      if len(group) > 1:
+        node = _VisitFused(node, group)
+      elif group:
+        node = _Visit(node, group[0])
+      group = []
+      if visitor is not None:
+        node = _Visit(node, visitor)
+    return node
+
   def Replace(self, *args, **kwargs):
-    return attrs.evolve(self, *args, **kwargs)
+    new_node = attrs.evolve(self, *args, **kwargs)
+    if self._lookup_fields and self._lookup_fields.isdisjoint(kwargs):
+      try:
+        object.__setattr__(new_node, "_name2item", self._name2item)
+      except AttributeError:
+        pass  # The cache hasn't been populated yet.
+    return new_node
 
 
 # The set of visitor names currently being processed.
 _visiting = set()
 
+# The number of nodes and tuples that visitors created so far.
+_num_allocated = 0
+
 
 def _Visit(node, visitor, *args, **kwargs):
   """Visit the node."""
@@ -114,18 +160,31 @@ def _Visit(node, visitor, *args, **kwargs):
   _visiting.add(name)
 
   start = metrics.get_cpu_clock()
+  num_allocated = _num_allocated
   try:
-    return _VisitNode(node, visitor, *args, **kwargs)
+    if visitor.collector:
+      return _CollectNode(node, visitor, *args, **kwargs)
+    elif visitor.iterative:
+      return _VisitNodeIteratively(node, visitor, *args, **kwargs)
+    else:
+      return _VisitNode(node, visitor, *args, **kwargs)
   finally:
     if not recursive:
       _visiting.remove(name)
       elapsed = metrics.get_cpu_clock() - start
       metrics.get_metric("visit_" + name, metrics.Distribution).add(elapsed)
+      metrics.get_metric("visit_allocated_" + name, metrics.Distribution).add(
+          _num_allocated - num_allocated)
       if _visiting:
         metrics.get_metric(
             "visit_nested_" + name, metrics.Distribution).add(elapsed)
 
 
+def _CountAllocation():
+  global _num_allocated
+  _num_allocated += 1
+
+
 def _VisitNode(node, visitor, *args, **kwargs):
   """Transform a node and all its children using a visitor.
 
@@ -172,6 +231,7 @@ def _VisitNode(node, visitor, *args, **kwargs):
       new_children.append(new_child)
     if changed:
       # Since some of our children changed, instantiate a new node.
+      _CountAllocation()
       return node_class(new_children)
     else:
       # Optimization: if we didn't change any of the children, keep the entire
@@ -212,6 +272,7 @@ def _VisitNode(node, visitor, *args, **kwargs):
         changed = True
     new_children.append(new_child)
   if changed:
+    _CountAllocation()
     new_node = node_class(*new_children)
   else:
     new_node = node
@@ -226,3 +287,313 @@ def _VisitNode(node, visitor, *args, **kwargs):
 
   del visitor.old_node
   return new_node
+
+
+def _CollectNode(node, visitor, *args, **kwargs):
+  """Walk a node and all its children with a collector visitor.
+
+  Like _VisitNodeIteratively, but without rebuilding any nodes, since a
+  collector doesn't change the tree.
+
+  Args:
+    node: The node to walk.
+    visitor: The visitor to apply.
+    *args: Passed to visitor callbacks.
+    **kwargs: Passed to visitor callbacks.
+  Returns:
+    The result of the Visit function for the node, if it has one, or the node.
+  """
+  visit_class_names = visitor.visit_class_names
+  enter_functions = visitor.enter_functions
+  result = node
+  # Each frame is a pair of a node and an iterator over its children. The frame
+  # of the node whose children we are walking is not on the stack.
+  stack = []
+  frame = (None, iter((node,)))
+  while True:
+    for child in frame[1]:
+      child_class = child.__class__
+      if child_class is tuple:
+        stack.append(frame)
+        frame = (child, iter(child))
+        break
+      elif (child_class.__name__ in visit_class_names and
+            isinstance(child, Node)):
+        children = _Children(child)
+        child_class_name = child_class.__name__
+        if child_class_name in enter_functions:
+          status = visitor.Enter(child, *args, **kwargs)
+          if status is False:  # pylint: disable=g-bool-id-comparison
+            continue
+          elif isinstance(status, set):
+            # Don't walk the fields in status.
+            children = [
+                value for field, value in zip(child_class.__attrs_attrs__,
+                                              children)
+                if field.name not in status]
+          else:
+            # Any other value returned from Enter is ignored, so check:
+            assert status is None, repr((child_class_name, status))
+        stack.append(frame)
+        frame = (child, iter(children))
+        break
+    else:
+      # We walked all the children of the node in the frame, so now we can
+      # visit the node itself.
+      if not stack:
+        return result
+      old_node = frame[0]
+      new_node = old_node
+      node_class = old_node.__class__
+      if node_class is not tuple:
+        node_class_name = node_class.__name__
+        visitor.old_node = old_node
+        if (visitor.visits_all_node_types or
+            node_class_name in visitor.visit_functions):
+          new_node = visitor.Visit(old_node, *args, **kwargs)
+        if node_class_name in visitor.leave_functions:
+          visitor.Leave(old_node, *args, **kwargs)
+        del visitor.old_node
+      frame = stack.pop()
+      if not stack:
+        # This was the root.
+        result = new_node
+
+
+@attrs.frozen
+class _SkippedChild:
+  """A child that _VisitNodeIteratively doesn't visit."""
+  value: Any
+
+
+def _VisitNodeIteratively(node, visitor, *args, **kwargs):
+  """Transform a node and all its children using a visitor.
+
+  This is equivalent to _VisitNode, but keeps the nodes that are being visited
+  on an explicit stack instead of recursing, so the depth of the tree is not
+  limited by the recursion limit.
+
+  Args:
+    node: The node to transform.
+    visitor: The visitor to apply.
+    *args: Passed to visitor callbacks.
+    **kwargs: Passed to visitor callbacks.
+  Returns:
+    The transformed Node.
+  """
+  visit_class_names = visitor.visit_class_names
+  enter_functions = visitor.enter_functions
+  # Each frame is a list of [node, iterator over children, new children,
+  # whether any child changed]. The frame of the node whose children we are
+  # visiting is not on the stack. The bottom frame holds the result.
+  stack = []
+  frame = [None, iter((node,)), [], False]
+  while True:
+    new_children = frame[2]
+    for child in frame[1]:
+      child_class = child.__class__
+      if child_class is tuple:
+        stack.append(frame)
+        frame = [child, iter(child), [], False]
+        break
+      elif (child_class.__name__ in visit_class_names and
+            isinstance(child, Node)):
+        children = _Children(child)
+        child_class_name = child_class.__name__
+        if child_class_name in enter_functions:
+          status = visitor.Enter(child, *args, **kwargs)
+          if status is False:  # pylint: disable=g-bool-id-comparison
+            new_children.append(child)
+            continue
+          elif isinstance(status, set):
+            # Don't visit the fields in status.
+            children = [
+                _SkippedChild(value) if field.name in status else value
+                for field, value in zip(child_class.__attrs_attrs__, children)]
+          else:
+            # Any other value returned from Enter is ignored, so check:
+            assert status is None, repr((child_class_name, status))
+        stack.append(frame)
+        frame = [child, iter(children), [], False]
+        break
+      elif child_class is _SkippedChild:
+        new_children.append(child.value)
+      else:
+        new_children.append(child)
+    else:
+      # We visited all the children of the node in the frame on top of the
+      # stack, so now we can visit the node itself.
+      if not stack:
+        new_node, = new_children
+        return new_node
+      old_node, _, _, changed = frame
+      node_class = old_node.__class__
+      if changed:
+        _CountAllocation()
+      if node_class is tuple:
+        new_node = node_class(new_children) if changed else old_node
+      else:
+        new_node = node_class(*new_children) if changed else old_node
+        node_class_name = node_class.__name__
+        visitor.old_node = old_node
+        if (visitor.visits_all_node_types or
+            node_class_name in visitor.visit_functions):
+          new_node = visitor.Visit(new_node, *args, **kwargs)
+        if node_class_name in visitor.leave_functions:
+          visitor.Leave(old_node, *args, **kwargs)
+        del visitor.old_node
+      frame = stack.pop()
+      frame[2].append(new_node)
+      if new_node is not old_node:
+        frame[3] = True
+
+
+def _VisitFused(node, visitors):
+  """Apply fusable visitors to a tree in a single traversal."""
+  start = metrics.get_cpu_clock()
+  try:
+    return _FusedVisit(visitors).Run(node)
+  finally:
+    metrics.get_metric("visit_fused", metrics.Distribution).add(
+        metrics.get_cpu_clock() - start)
+
+
+class _FusedVisit:
+  """Applies a sequence of visitors in one traversal.
+
+  Applying visitors V1, ..., Vn to a tree is equivalent to calling
+  tree.Visit(V1)...Visit(Vn). Fusable visitors have no Enter or Leave functions
+  and their Visit functions only depend on the visited node, so the result of
+  Vi on a given subtree never changes, and can be remembered.
+
+  We transform a node's children with all visitors before the node itself. Most
+  subtrees are left unchanged by every visitor; we remember those, and a node
+  whose children are all unchanged only needs the visitors' Visit functions
+  called on it. Otherwise, we apply V1, ..., Vn to the node in turn. Each Vi
+  reuses the remembered results for the children, and only descends into
+  subtrees that a previous visitor created.
+  """
+
+  def __init__(self, visitors):
+    self._visitors = visitors
+    # Subtrees that no visitor changes, as a map from id to subtree. The subtree
+    # is kept so that its id is not reused.
+    self._unchanged = {}
+    # Results of each visitor, as maps from id(input) to (input, output).
+    self._results = [{} for _ in visitors]
+    # The union of the visitors' visit_class_names, or None for all nodes.
+    self._visit_class_names = set()
+    for visitor in visitors:
+      if not isinstance(visitor.visit_class_names, (set, frozenset)):
+        self._visit_class_names = None
+        break
+      self._visit_class_names.update(visitor.visit_class_names)
+
+  def Run(self, node):
+    """Transform a visited node or tuple with all visitors."""
+    names = self._visit_class_names
+    unchanged = self._unchanged
+    children_unchanged = True
+    node_class = node.__class__
+    for child in (node if node_class is tuple else _Children(node)):
+      child_class = child.__class__
+      if child_class is tuple or (
+          (names is None or child_class.__name__ in names) and
+          isinstance(child, Node)):
+        self.Run(child)
+        if children_unchanged and id(child) not in unchanged:
+          children_unchanged = False
+    if children_unchanged:
+      new_node = self._VisitUnchangedChildren(node)
+      if new_node is node:
+        unchanged[id(node)] = node
+      return new_node
+    for i, results in enumerate(self._results):
+      result = results.get(id(node))
+      node = result[1] if result else self._Apply(i, node)
+    return node
+
+  def _VisitUnchangedChildren(self, node):
+    """Transform a node whose children no visitor changes."""
+    node_class = node.__class__
+    if node_class is tuple:
+      return node
+    node_class_name = node_class.__name__
+    new_node = node
+    for i, visitor in enumerate(self._visitors):
+      if new_node is not node:
+        # A previous visitor created a new node.
+        result = self._results[i].get(id(new_node))
+        new_node = result[1] if result else self._Apply(i, new_node)
+      elif (node_class_name in visitor.visit_class_names and
+            (visitor.visits_all_node_types or
+             node_class_name in visitor.visit_functions)):
+        visitor.old_node = node
+        new_node = visitor.Visit(node)
+        del visitor.old_node
+        if new_node is not node:
+          self._results[i][id(node)] = (node, new_node)
+    return new_node
+
+  def _Apply(self, i, node):
+    """Transform a node or tuple with the i-th visitor, if it visits it."""
+    node_class = node.__class__
+    visitor = self._visitors[i]
+    if node_class is not tuple:
+      node_class_name = node_class.__name__
+      if node_class_name not in visitor.visit_class_names:
+        return node
+    names = visitor.visit_class_names
+    unchanged = self._unchanged
+    results = self._results[i]
+    changed = False
+    new_children = []
+    for child in (node if node_class is tuple else _Children(node)):
+      child_class = child.__class__
+      if child_class is tuple or (
+          child_class.__name__ in names and isinstance(child, Node)):
+        if id(child) in unchanged:
+          new_child = child
+        else:
+          result = results.get(id(child))
+          new_child = result[1] if result else self._Apply(i, child)
+          if new_child is not child:
+            changed = True
+      else:
+        new_child = child
+      new_children.append(new_child)
+    if changed:
+      _CountAllocation()
+    if node_class is tuple:
+      new_node = tuple(new_children) if changed else node
+    else:
+      new_node = node_class(*new_children) if changed else node
+      if (visitor.visits_all_node_types or
+          node_class_name in visitor.visit_functions):
+        visitor.old_node = node
+        new_node = visitor.Visit(new_node)
+        del visitor.old_node
+    results[id(node)] = (node, new_node)
+    return new_node
+
+
+# Functions that get all fields of a node as a tuple, by node class.
+_children_getters = {}
+
+
+def _Children(node):
+  """Get the fields of a node as a tuple."""
+  node_class = node.__class__
+  getter = _children_getters.get(node_class)
+  if getter is None:
+    # Directly accessing __attrs_attrs__ is faster than calling attrs.fields.
+    names = [field.name for field in node_class.__attrs_attrs__]
+    if not names:
+      getter = lambda node: ()
+    elif len(names) == 1:
+      name, = names
+      getter = lambda node: (getattr(node, name),)
+    else:
+      getter = operator.attrgetter(*names)
+    _children_getters[node_class] = getter
+  return getter(node)
@@ -116,6 +116,53 @@ class SkipNodeVisitor(visitors.Visitor):
     return data.Replace(d1=0, d2=0, d3=0)
 
 
+class IncrementDataVisitor(visitors.Visitor):
+  """A fusable visitor that increments the d1 attribute of Data nodes."""
+
+  fusable = True
+
+  def VisitData(self, data):
+    return data.Replace(d1=data.d1 + 1)
+
+
+class VToDataVisitor(visitors.Visitor):
+  """A fusable visitor that changes V nodes to Data nodes."""
+
+  fusable = True
+
+  def VisitV(self, v):
+    return Data(v.x, 0, 0)
+
+
+class SwapXYVisitor(visitors.Visitor):
+  """A fusable visitor that swaps the children of XY nodes."""
+
+  fusable = True
+
+  def VisitXY(self, xy):
+    return XY(xy.y, xy.x)
+
+
+class CollectDataVisitor(visitors.Visitor):
+  """A collector that records Data nodes, skipping XY.y subtrees."""
+
+  collector = True
+
+  def __init__(self):
+    super().__init__()
+    self.data = []
+
+  def EnterXY(self, _):
+    return {"y"}
+
+  def VisitData(self, data):
+    self.data.append(data.d1)
+    return data.Replace(d1=0)
+
+  def VisitXY(self, _):
+    return len(self.data)
+
+
 # We want to test == and != so:
 # pylint: disable=g-generic-assert
 class TestNode(unittest.TestCase):
@@ -260,6 +307,39 @@ class TestNode(unittest.TestCase):
     new_v_expected = "V(x=(Data(d1=1, d2=2, d3=-1), Data(d1=4, d2=5, d3=-1)))"
     self.assertEqual(repr(new_v), new_v_expected)
 
+  def test_visit_all(self):
+    """Test that node.Node.VisitAll() matches a sequence of Visit() calls."""
+    data = Data(1, 2, 3)
+    tree = XY(X(V(10), (data, V(20))), XY(Y(data, 1), (V(30),)))
+    visitor_classes = [IncrementDataVisitor, VToDataVisitor, SwapXYVisitor,
+                       DataVisitor, SkipNodeVisitor]
+    for classes in itertools.product(visitor_classes, repeat=3):
+      with self.subTest(visitors=[cls.__name__ for cls in classes]):
+        expected = tree
+        for cls in classes:
+          expected = expected.Visit(cls())
+        self.assertEqual(tree.VisitAll([cls() for cls in classes]), expected)
+
+  def test_visit_all_unchanged(self):
+    """Test that node.Node.VisitAll() returns trees it doesn't change as is."""
+    tree = XY(X(1, (2, 3)), Y((), V(4)))
+    self.assertIs(tree.VisitAll([IncrementDataVisitor(), DataVisitor()]),
+                  tree)
+
+  def test_collector(self):
+    tree = V((XY(Data(1, 2, 3), Data(4, 5, 6)), Data(7, 8, 9)))
+    visitor = CollectDataVisitor()
+    self.assertIs(tree.Visit(visitor), tree)
+    self.assertEqual(visitor.data, [1, 7])
+
+  def test_collector_root(self):
+    tree = XY(V(Data(1, 2, 3)), XY(Data(4, 5, 6), Data(7, 8, 9)))
+    self.assertEqual(tree.Visit(CollectDataVisitor()), 1)
+
+  def test_implicit_collector(self):
+    self.assertFalse(DataVisitor().collector)
+    self.assertTrue(visitors.CollectDependencies().collector)
+
   def test_ordering(self):
     nodes = [Node1(True, False), Node1(1, 2),
              Node2(1, 1), Node2("2", "1"),
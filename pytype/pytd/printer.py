@@ -14,6 +14,8 @@ from pytype.pytd.parse import parser_constants
 # Aliases for readability:
 _NameType = _AliasType = str
 
+_LITERAL_RE = re.compile(r"Literal\[(?P<content>.*)\]")
+
 
 class _TypingImports:
   """Imports from the `typing` module."""
@@ -23,15 +25,22 @@ class _TypingImports:
     self._members: Dict[_AliasType, _NameType] = {}
     # The number of times that each typing member is used.
     self._counts: Dict[_NameType, int] = collections.defaultdict(int)
+    # The inverse of _members, computed on demand. Members are added far more
+    # often than they change, so it is kept until _members changes.
+    self._aliases: Optional[Dict[_NameType, _AliasType]] = None
 
   @property
   def members(self):
     # Note that when a typing member has multiple aliases, this keeps only one.
-    return {name: alias for alias, name in self._members.items()}
+    if self._aliases is None:
+      self._aliases = {name: alias for alias, name in self._members.items()}
+    return self._aliases
 
   def add(self, name: str, alias: str):
     self._counts[name] += 1
-    self._members[alias] = name
+    if self._members.get(alias) != name:
+      self._members[alias] = name
+      self._aliases = None
 
   def decrement_count(self, name: str):
     self._counts[name] -= 1
@@ -163,6 +172,7 @@ class PrintVisitor(base_visitor.Visitor):
     copy._local_names = set(self._local_names)
     copy._imports._typing._members = dict(
         self._imports._typing._members)
+    copy._imports._typing._aliases = self._imports._typing._aliases
     copy._imports._reverse_alias_map = dict(
         self._imports._reverse_alias_map)
     # pylint: enable=protected-access
@@ -429,11 +439,11 @@ class PrintVisitor(base_visitor.Visitor):
       # We have multiple methods, and every method has multiple signatures
       # (i.e., the method string will have multiple lines). Combine this into
       # an array that contains all the lines, then indent the result.
-      class_lines = sum((m.splitlines() for m in node.classes), [])
-      classes = [self.INDENT + m for m in class_lines]
+      classes = [self.INDENT + line
+                 for m in node.classes for line in m.splitlines()]
       constants = [self.INDENT + m for m in node.constants]
-      method_lines = sum((m.splitlines() for m in node.methods), [])
-      methods = [self.INDENT + m for m in method_lines]
+      methods = [self.INDENT + line
+                 for m in node.methods for line in m.splitlines()]
     else:
       header[-1] += " ..."
       constants = []
@@ -770,7 +780,7 @@ class PrintVisitor(base_visitor.Visitor):
     literals = []
     new_type_list = []
     for t in type_list:
-      match = re.fullmatch(r"Literal\[(?P<content>.*)\]", t)
+      match = t.startswith("Literal[") and _LITERAL_RE.fullmatch(t)
       if match:
         literals.append(match.group("content"))
       else:
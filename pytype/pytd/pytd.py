@@ -69,6 +69,9 @@ class TypeDeclUnit(Node):
   functions: Tuple['Function', ...]
   aliases: Tuple['Alias', ...]
 
+  _lookup_fields = frozenset(
+      {'constants', 'type_params', 'classes', 'functions', 'aliases'})
+
   def _InitCache(self):
     # TODO(b/159053187): Put constants, functions, classes and aliases into a
     # combined dict.
@@ -172,6 +175,8 @@ class Class(Node):
   slots: Optional[Tuple[str, ...]]
   template: Tuple['TemplateItem', ...]
 
+  _lookup_fields = frozenset({'methods', 'constants', 'classes'})
+
   def _InitCache(self):
     # TODO(b/159053187): Put constants, functions, classes and aliases into a
     # combined dict.
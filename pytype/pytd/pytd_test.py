@@ -1,6 +1,7 @@
 """Tests for pytd.py."""
 
 import itertools
+import pickle
 
 from pytype.pytd import pytd
 import unittest
@@ -53,6 +54,39 @@ class TestPytd(unittest.TestCase):
     self.assertTrue(pytd.AnythingType())
     self.assertTrue(pytd.NothingType())
 
+  def _make_class(self, *constants):
+    return pytd.Class("A", (), (), (), tuple(constants), (), (), None, ())
+
+  def test_replace_keeps_lookup_cache(self):
+    x = pytd.Constant("x", self.int)
+    cls = self._make_class(x)
+    self.assertIs(cls.Lookup("x"), x)
+    new_cls = cls.Replace(name="B")
+    self.assertIs(new_cls._name2item, cls._name2item)
+    self.assertIs(new_cls.Lookup("x"), x)
+
+  def test_replace_resets_lookup_cache(self):
+    cls = self._make_class(pytd.Constant("x", self.int))
+    cls.Lookup("x")
+    y = pytd.Constant("y", self.float)
+    new_cls = cls.Replace(constants=(y,))
+    self.assertIs(new_cls.Lookup("y"), y)
+    self.assertIsNone(new_cls.Get("x"))
+
+  def test_replace_module_keeps_lookup_cache(self):
+    x = pytd.Constant("foo.x", self.int)
+    module = pytd.TypeDeclUnit("foo", (x,), (), (), (), ())
+    module.Lookup("foo.x")
+    new_module = module.Replace(name="bar")
+    self.assertIs(new_module._name2item, module._name2item)
+    self.assertIsNone(module.Replace(constants=()).Get("foo.x"))
+
+  def test_pickle_keeps_lookup_cache(self):
+    cls = self._make_class(pytd.Constant("x", self.int))
+    cls.Lookup("x")
+    new_cls = pickle.loads(pickle.dumps(cls))
+    self.assertIs(new_cls._name2item["x"], new_cls.constants[0])
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -96,6 +96,8 @@ class ExtractSuperClasses(base_visitor.Visitor):
   to lists of pytd.Type.
   """
 
+  collector = True
+
   def __init__(self):
     super().__init__()
     self._superclasses = {}
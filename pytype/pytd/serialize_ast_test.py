@@ -1,5 +1,3 @@
-import pickle
-
 from pytype import config
 from pytype import load_pytd
 from pytype.imports import pickle_utils
@@ -105,8 +103,7 @@ class SerializeAstTest(test_base.UnitTest):
       result = pickle_utils.StoreAst(ast, pickled_ast_filename)
 
       self.assertIsNone(result)
-      with open(pickled_ast_filename, "rb") as fi:
-        serialized_ast = pickle.load(fi)
+      serialized_ast = pickle_utils.LoadPickle(pickled_ast_filename)
       self.assertTrue(serialized_ast.ast)
       self.assertCountEqual(
           dict(serialized_ast.dependencies),
@@ -15,6 +15,7 @@ from typing import Dict, Optional, Union
 
 import attrs
 
+from pytype import metrics
 from pytype import utils
 from pytype.pytd import booleq
 from pytype.pytd import escape
@@ -25,6 +26,8 @@ from pytype.pytd.parse import node
 
 log = logging.getLogger(__name__)
 
+_cache_metric = metrics.MapCounter("type_match_cache")
+
 
 is_complete = escape.is_complete
 
@@ -97,6 +100,12 @@ class TypeMatch(pytd_utils.TypeMatcher):
     self.any_also_is_bottom = any_also_is_bottom
     self.solver = booleq.Solver()
     self._implications = {}
+    # Maps types to the names of the type parameters in them.
+    self._type_param_names = {}
+    # Maps classes to their methods, by name.
+    self._class_methods = {}
+    # Maps protocols to their abstract methods.
+    self._abstract_methods = {}
 
   def default_match(self, t1, t2, *unused_args, **unused_kwargs):
     # Don't allow pytd_utils.TypeMatcher to do default matching.
@@ -275,10 +284,47 @@ class TypeMatch(pytd_utils.TypeMatcher):
     class_and_subclasses = self.get_subclasses(t)
     return [self.unclass(t) for t in class_and_subclasses]
 
+  def _get_type_param_names(self, t):
+    names = self._type_param_names.get(t)
+    if names is None:
+      names = self._type_param_names[t] = frozenset(
+          p.name for p in pytd_utils.GetTypeParameters(t))
+    return names
+
+  def _get_relevant_subst(self, t1, t2, subst):
+    """Get the entries of subst that matching t1 against t2 can look up.
+
+    These are the entries for the type parameters in t1 and t2, and,
+    transitively, in the types that those are substituted with. Entries are
+    selected by type parameter name, which may select more than needed.
+
+    Args:
+      t1: A pytd.Type.
+      t2: A pytd.Type.
+      subst: Current type parameters.
+    Returns:
+      A frozenset of (type parameter, type) items of subst.
+    """
+    if not subst:
+      return frozenset()
+    relevant = set()
+    names = self._get_type_param_names(t1) | self._get_type_param_names(t2)
+    while names:
+      items = {(k, v) for k, v in subst.items() if k.name in names} - relevant
+      relevant |= items
+      names = frozenset().union(*(self._get_type_param_names(v)
+                                  for _, v in items if v is not None))
+    return frozenset(relevant)
+
   def match_type_against_type(self, t1, t2, subst):
-    types = (t1, t2, frozenset(subst.items()))
+    # The result only depends on the part of subst that t1 and t2 use, so
+    # that is all we key the cache on. The same types are often matched with
+    # different signatures' type parameters in subst.
+    types = (t1, t2, self._get_relevant_subst(t1, t2, subst))
     if types in self._implications:
+      _cache_metric.inc("hit")
       return self._implications[types]
+    _cache_metric.inc("miss")
     implication = self._implications[types] = self._match_type_against_type(
         t1, t2, subst)
     return implication
@@ -441,9 +487,9 @@ class TypeMatch(pytd_utils.TypeMatcher):
         for s1 in f1.signatures)
 
   def match_Function_against_Class(self, f1, cls2, subst, cache):
-    cls2_methods = cache.get(id(cls2))
+    cls2_methods = cache.get(cls2)
     if cls2_methods is None:
-      cls2_methods = cache[id(cls2)] = {f.name: f for f in cls2.methods}
+      cls2_methods = cache[cls2] = {f.name: f for f in cls2.methods}
     if f1.name not in cls2_methods:
       # The class itself doesn't have this method, but base classes might.
       # TODO(b/159058933): This should do MRO order, not depth-first.
@@ -490,15 +536,18 @@ class TypeMatch(pytd_utils.TypeMatcher):
 
   def match_Protocol_against_Unknown(self, protocol, unknown, subst):  # pylint: disable=invalid-name
     """Match a typing.Protocol against an unknown class."""
-    filtered_methods = [f for f in protocol.methods if f.is_abstract]
+    filtered_methods = self._abstract_methods.get(protocol)
+    if filtered_methods is None:
+      filtered_methods = self._abstract_methods[protocol] = [
+          f for f in protocol.methods if f.is_abstract]
     return self.match_Functions_against_Class(
         filtered_methods, unknown, subst)
 
   def match_Functions_against_Class(self, methods, cls2, subst):
     implications = []
-    cache = {}
     for f1 in methods:
-      implication = self.match_Function_against_Class(f1, cls2, subst, cache)
+      implication = self.match_Function_against_Class(
+          f1, cls2, subst, self._class_methods)
       implications.append(implication)
       if implication is booleq.FALSE:
         break
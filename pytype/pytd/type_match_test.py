@@ -1,6 +1,7 @@
 """Tests for type_match.py."""
 
 import textwrap
+from unittest import mock
 
 from pytype.pyi import parser
 from pytype.pytd import booleq
@@ -441,6 +442,25 @@ class TestTypeMatch(parser_test_base.ParserTest):
     self.assertEqual(m.match_Generic_against_Generic(v4, v5, {}), booleq.TRUE)
     self.assertEqual(m.match_Generic_against_Generic(v5, v4, {}), booleq.FALSE)
 
+  def test_cache_ignores_unused_type_parameters(self):
+    m = type_match.TypeMatch({})
+    t = pytd.TypeParameter("T")
+    u = pytd.TypeParameter("U")
+    v = pytd.TypeParameter("V")
+    a = pytd.NamedType("A")
+    with mock.patch.object(m, "_match_type_against_type",
+                           wraps=m._match_type_against_type) as match:  # pylint: disable=protected-access
+      eq1 = m.match_type_against_type(a, t, {t: u, u: a})
+      # The substitution for V is irrelevant, so the match is cached.
+      eq2 = m.match_type_against_type(a, t, {t: u, u: a, v: None})
+      self.assertEqual(match.call_count, 1)
+      # The substitution for U, which T is substituted with, is relevant.
+      eq3 = m.match_type_against_type(a, t, {t: u, u: pytd.NamedType("B")})
+      self.assertEqual(match.call_count, 2)
+    self.assertEqual(eq1, booleq.TRUE)
+    self.assertIs(eq2, eq1)
+    self.assertEqual(eq3, booleq.FALSE)
+
 
 if __name__ == "__main__":
   unittest.main()
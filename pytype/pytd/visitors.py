@@ -64,6 +64,8 @@ class FillInLocalPointers(Visitor):
     if fallback is not None:
       lookup_map["*"] = fallback
     self._lookup_map = lookup_map
+    # The number of ClassType nodes visited, for metrics.
+    self.num_class_types = 0
 
   def _Lookup(self, node):
     """Look up a node by name."""
@@ -104,6 +106,7 @@ class FillInLocalPointers(Visitor):
       attribute. Call VerifyLookup() on your tree if you want to be sure that
       all of the cls pointers have been filled in.
     """
+    self.num_class_types += 1
     nodes = [node]
     seen = set()
     while nodes:
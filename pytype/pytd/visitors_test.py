@@ -1,8 +1,12 @@
 import textwrap
+from unittest import mock
 
+from pytype.pytd import base_visitor
 from pytype.pytd import escape
+from pytype.pytd import optimize
 from pytype.pytd import pytd
 from pytype.pytd import pytd_utils
+from pytype.pytd import pytd_visitors
 from pytype.pytd import visitors
 from pytype.pytd.parse import parser_test_base
 
@@ -952,6 +956,95 @@ class TestVisitors(parser_test_base.ParserTest):
         """).strip())
 
 
+class IterativeVisitTest(parser_test_base.ParserTest):
+  """Tests that the iterative and recursive visitor engines agree."""
+
+  SRC = textwrap.dedent("""
+      from typing import Any, Callable, Generic, List, Tuple, TypeVar, Union
+      import foo
+      T = TypeVar("T")
+      K = TypeVar("K")
+      x: Union[int, str, List[Union[int, float]]]
+      y: Tuple[int, ...]
+      z = foo.Bar
+      class A(Generic[T]):
+        a: T
+        def f(self, x: T, *args, y: int = ..., **kwargs) -> List[T]: ...
+        def g(self: A[int], x: Callable[[int, str], T]) -> Union[T, None]:
+          raise ValueError()
+        class B:
+          def h(self) -> A.B: ...
+      class C(A[int], foo.Base):
+        def f(self, x: int, *args, y: int = ..., **kwargs) -> List[int]: ...
+        @property
+        def p(self) -> int: ...
+      def f(x: K) -> K: ...
+      def f(x: int, y: object) -> Union[int, str]: ...
+  """)
+
+  def _get_visitor_classes(self):
+    classes = set()
+    for module in (optimize, pytd_visitors, visitors):
+      for value in vars(module).values():
+        if (isinstance(value, type) and
+            issubclass(value, base_visitor.Visitor) and
+            value is not base_visitor.Visitor):
+          classes.add(value)
+    return sorted(classes, key=lambda cls: (cls.__module__, cls.__name__))
+
+  def _visit(self, cls):
+    try:
+      return repr(self.Parse(self.SRC).Visit(cls()))
+    except Exception as e:  # pylint: disable=broad-except
+      return type(e)
+
+  def test_equivalence(self):
+    tested = 0
+    for cls in self._get_visitor_classes():
+      try:
+        cls()
+      except TypeError:
+        # The visitor has required arguments.
+        continue
+      with self.subTest(visitor=cls.__name__):
+        self.assertTrue(cls.iterative)
+        iterative_result = self._visit(cls)
+        with mock.patch.object(cls, "iterative", False):
+          recursive_result = self._visit(cls)
+        self.assertEqual(iterative_result, recursive_result)
+        tested += 1
+    self.assertGreater(tested, 20)
+
+  def test_skip_children(self):
+    class SkipClassesVisitor(visitors.Visitor):
+      """Renames types outside of classes."""
+
+      def EnterTypeDeclUnit(self, _):
+        return {"classes"}
+
+      def VisitNamedType(self, t):
+        return t.Replace(name="renamed")
+
+    iterative_result = self.Parse(self.SRC).Visit(SkipClassesVisitor())
+    with mock.patch.object(SkipClassesVisitor, "iterative", False):
+      recursive_result = self.Parse(self.SRC).Visit(SkipClassesVisitor())
+    self.assertIn("renamed", pytd_utils.Print(iterative_result))
+    self.assertEqual(pytd_utils.Print(iterative_result),
+                     pytd_utils.Print(recursive_result))
+
+  def test_deep_tree(self):
+    t = pytd.NamedType("int")
+    for _ in range(10000):
+      t = pytd.GenericType(pytd.NamedType("list"), (t,))
+    t = t.Visit(visitors.NamedTypeToClassType())
+    depth = 0
+    while isinstance(t, pytd.GenericType):
+      t, = t.parameters
+      depth += 1
+    self.assertEqual(depth, 10000)
+    self.assertEqual(t, pytd.ClassType("int"))
+
+
 class ReplaceModulesWithAnyTest(unittest.TestCase):
 
   def test_any_replacement(self):
@@ -16,7 +16,10 @@ from pytype import io
 from pytype import load_pytd
 from pytype import metrics
 from pytype import utils
+from pytype.imports import builtin_stubs
+from pytype.imports import stub_cache
 from pytype.imports import typeshed
+from pytype.pyi import parser
 
 
 log = logging.getLogger(__name__)
@@ -57,6 +60,40 @@ def _generate_builtins_pickle(options):
   loader.save_to_pickle(options.generate_builtins)
 
 
+def _get_stub_sources(python_version):
+  """Get the (module name, filename, contents) of all builtin and typeshed stubs.
+
+  Args:
+    python_version: The target python version.
+
+  Yields:
+    The stubs that the loader may parse, in every location that it searches.
+  """
+  t = typeshed.Typeshed()
+  for m in sorted(filter(None, t.get_all_module_names(python_version))):
+    for namespace in ("builtins", "stdlib"):
+      for as_package in (False, True):
+        try:
+          yield (m,) + builtin_stubs.GetPredefinedFile(
+              namespace, m, as_package=as_package)
+        except OSError:
+          pass
+    for namespace in ("stdlib", "third_party"):
+      try:
+        yield (m,) + t.get_module_file(namespace, m, python_version)
+      except OSError:
+        pass
+
+
+def _warm_stub_cache(options):
+  """Parse all builtin and typeshed stubs into the stub cache."""
+  stubs = _get_stub_sources(options.python_version)
+  num_cached, num_failed = stub_cache.warm(
+      stubs, parser.PyiOptions.from_toplevel_options(options))
+  print(f"{num_cached} stubs cached in {options.stub_cache}, "
+        f"{num_failed} could not be parsed")
+
+
 def main():
   try:
     options = config.Options(sys.argv[1:], command_line=True)
@@ -91,6 +128,8 @@ def _run_pytype(options):
   """Run pytype with the given configuration options."""
   if options.generate_builtins:
     return _generate_builtins_pickle(options)
+  elif options.warm_stub_cache:
+    return _warm_stub_cache(options)
   elif options.parse_pyi:
     unused_ast = io.parse_pyi(options)
     return 0
@@ -0,0 +1,177 @@
+"""A persistent cache of function call summaries.
+
+InterpreterFunction.call remembers the results of calls within a process, but
+every pytype run analyzes the same helper functions again. With
+--function-summary-cache DIR, the result of a call is stored in DIR as a pytd
+type, and later runs that make the same call use the stored type instead of
+running the function.
+
+A summary is only stored if it's valid wherever the same function is called
+with the same arguments, and it's keyed by everything that its computation
+depends on: the pytype version, the analysis options, the function's bytecode
+(with its annotations, but without its line numbers), the types of its
+arguments, and the types of the module globals that it may use. So that these
+are all captured by pytd types, a call is only summarized if:
+  * The function doesn't use a closure, isn't a generator or coroutine, and
+    doesn't define functions, classes or comprehensions.
+  * The types of its arguments and of the globals it uses, and its return type,
+    are made up of builtins and typing classes. So the call can't have run user
+    code, which might have needed to record calls or report errors of its own.
+  * No errors were reported while running it, even if they were disabled.
+  * It didn't change the types of its arguments or of the globals it uses.
+
+Calls that return a summary are analyzed like calls of a function in a .pyi
+file: the result is an instance of the summarized return type.
+"""
+
+import hashlib
+import logging
+import pickle
+from typing import Any, Iterable, Optional, Tuple
+
+from pytype import __version__
+from pytype import file_utils
+from pytype import metrics
+from pytype.platform_utils import path_utils
+from pytype.pytd import base_visitor
+from pytype.pytd import pytd
+from pytype.pytd import pytd_visitors
+
+log = logging.getLogger(__name__)
+
+_cache_metric = metrics.MapCounter("function_summary_cache")
+
+# The suffix of cache entries.
+_SUFFIX = ".summary"
+
+# Options that don't affect the analysis of a call whose summary can be cached.
+# Summaries only involve builtins and typing, so the options that locate other
+# modules are left out too, which lets modules and projects share summaries.
+_IGNORED_OPTIONS = frozenset({
+    "analysis_profile", "check_preconditions", "debug", "debug_logs",
+    "exec_log", "function_summary_cache", "imports_map", "input",
+    "memory_snapshots", "metrics", "module_name", "nofail", "output",
+    "output_debug", "output_errors_csv", "pickle_output", "profile",
+    "pythonpath", "return_success", "show_config", "skip_unchanged_output",
+    "stub_cache", "timeout", "timestamp_logs", "touch", "verbosity",
+    "verify_pickle", "version", "warm_stub_cache",
+})
+
+# Modules whose classes a summary may use.
+_PORTABLE_MODULES = ("builtins", "typing")
+
+# Types that don't identify their values. A summary could otherwise use e.g. a
+# function argument that is stored as a Callable but runs user code.
+_OPAQUE_TYPES = frozenset({
+    "builtins.function", "builtins.module", "builtins.type", "typing.Callable",
+    "typing.Type",
+})
+
+
+def _get_options_key(options) -> str:
+  items = sorted((k, repr(v)) for k, v in vars(options).items()
+                 if k not in _IGNORED_OPTIONS and not k.startswith("_"))
+  return repr((__version__.__version__, items))
+
+
+class _PortabilityChecker(base_visitor.Visitor):
+  """Checks whether a type only uses classes that summaries may use."""
+
+  def __init__(self):
+    super().__init__()
+    self.portable = True
+
+  def _CheckName(self, name):
+    if name.partition(".")[0] not in _PORTABLE_MODULES or name in _OPAQUE_TYPES:
+      self.portable = False
+
+  def EnterClassType(self, t):
+    self._CheckName(t.name)
+
+  def EnterNamedType(self, t):
+    self._CheckName(t.name)
+
+  def EnterLateType(self, _):
+    self.portable = False
+
+  def EnterTypeParameter(self, _):
+    self.portable = False
+
+
+def is_portable(t: pytd.Type) -> bool:
+  """Whether a type only uses builtins and typing classes that identify values.
+
+  Args:
+    t: A pytd type.
+
+  Returns:
+    True if a summary may use the type.
+  """
+  checker = _PortabilityChecker()
+  t.Visit(checker)
+  return checker.portable
+
+
+class SummaryCache:
+  """A directory of function call summaries."""
+
+  def __init__(self, cache_dir: str, options):
+    self._cache_dir = cache_dir
+    self._options_key = _get_options_key(options)
+
+  def get_key(self, code_key: Tuple[Any, ...],
+              arg_types: Iterable[Tuple[str, str]],
+              global_types: Iterable[Tuple[str, str]]) -> str:
+    """Get the cache key of a call.
+
+    Args:
+      code_key: A description of the function's code.
+      arg_types: (name, printed pytd type) pairs for the arguments.
+      global_types: (name, printed pytd type) pairs for the globals that the
+        function may use.
+
+    Returns:
+      The key.
+    """
+    h = hashlib.sha256()
+    h.update(repr((self._options_key, code_key, tuple(arg_types),
+                   tuple(global_types))).encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+  def _get_path(self, key):
+    return path_utils.join(self._cache_dir, key[:2], key + _SUFFIX)
+
+  def load(self, key: str, loader) -> Optional[pytd.Type]:
+    """Load a summary.
+
+    Args:
+      key: The call's key.
+      loader: A load_pytd.Loader, to look up the classes in the summary.
+
+    Returns:
+      The summarized return type, or None if there is no summary.
+    """
+    path = self._get_path(key)
+    try:
+      with open(path, "rb") as f:
+        t = pickle.loads(f.read())
+    except FileNotFoundError:
+      _cache_metric.inc("miss")
+      return None
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+      log.warning("Ignoring unreadable function summary %s: %s", path, e)
+      _cache_metric.inc("miss")
+      return None
+    _cache_metric.inc("hit")
+    return loader.resolve_pytd(t, loader.import_name("builtins"))
+
+  def store(self, key: str, t: pytd.Type):
+    """Store a summary. The type must be portable."""
+    assert is_portable(t), t
+    # ClassType nodes would pickle the classes they point to.
+    t = t.Visit(pytd_visitors.ClassTypeToNamedType())
+    try:
+      file_utils.write_atomically(
+          self._get_path(key), pickle.dumps(t, pickle.HIGHEST_PROTOCOL))
+    except OSError as e:
+      log.warning("Couldn't write function summary %s: %s", key, e)
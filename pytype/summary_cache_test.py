@@ -0,0 +1,106 @@
+"""Tests for summary_cache.py."""
+
+import os
+import pickle
+
+from pytype import config
+from pytype import summary_cache
+from pytype.pytd import pytd
+from pytype.pytd import pytd_utils
+from pytype.tests import test_base
+from pytype.tests import test_utils
+
+
+def _entries(cache_dir):
+  return [os.path.join(root, f)
+          for root, _, files in os.walk(cache_dir) for f in files]
+
+
+class SummaryCacheTest(test_base.BaseTest):
+  """Tests for the function summary cache."""
+
+  def test_summarize(self):
+    src = """
+      SEP = ","
+      def join(xs, n):
+        return SEP.join(xs) * n
+      x = join(["a", "b"], 2)
+    """
+    with test_utils.Tempdir() as d:
+      self.ConfigureOptions(function_summary_cache=d.path)
+      ty1 = self.Infer(src)
+      self.assertEqual(len(_entries(d.path)), 1)
+      ty2 = self.Infer(src)
+      self.assertEqual(len(_entries(d.path)), 1)
+    self.assertTypesMatchPytd(ty2, """
+      SEP: str
+      x: str
+      def join(xs, n) -> str: ...
+    """)
+    self.assertTrue(pytd_utils.ASTeq(ty1, ty2))
+
+  def test_use_summary(self):
+    src = """
+      def f(x):
+        return x + 1
+      y = f(1)
+    """
+    with test_utils.Tempdir() as d:
+      self.ConfigureOptions(function_summary_cache=d.path)
+      self.Infer(src)
+      entry, = _entries(d.path)
+      with open(entry, "wb") as f:
+        f.write(pickle.dumps(pytd.NamedType("builtins.bytes")))
+      ty = self.Infer(src, deep=False)
+    self.assertTypesMatchPytd(ty, """
+      y: bytes
+      def f(x: int) -> bytes: ...
+    """)
+
+  def test_not_summarized(self):
+    with test_utils.Tempdir() as d:
+      self.ConfigureOptions(function_summary_cache=d.path)
+      self.Infer("""
+        class A:
+          pass
+        def f(a):
+          return a
+        def g(xs):
+          return [x for x in xs]
+        def h(xs):
+          xs.append(1)
+        def k(x):
+          return x.upper()
+        def m():
+          return A
+        f(A())
+        g([1])
+        h([])
+        k(0)
+        m()
+      """, report_errors=False)
+      self.assertFalse(_entries(d.path))
+
+  def test_key(self):
+    options = config.Options.create(python_version=self.python_version)
+    cache = summary_cache.SummaryCache("cache", options)
+    key = cache.get_key(("f",), [("x", "int")], [])
+    self.assertEqual(cache.get_key(("f",), [("x", "int")], []), key)
+    self.assertNotEqual(cache.get_key(("f",), [("x", "str")], []), key)
+    options.tweak(output="out.pyi", function_summary_cache="other")
+    self.assertEqual(summary_cache.SummaryCache("other", options).get_key(
+        ("f",), [("x", "int")], []), key)
+    options.tweak(strict_none_binding=True)
+    self.assertNotEqual(summary_cache.SummaryCache("cache", options).get_key(
+        ("f",), [("x", "int")], []), key)
+
+  def test_is_portable(self):
+    self.assertTrue(summary_cache.is_portable(pytd.GenericType(
+        pytd.NamedType("builtins.list"), (pytd.NamedType("typing.Any"),))))
+    self.assertFalse(summary_cache.is_portable(pytd.NamedType("foo.A")))
+    self.assertFalse(summary_cache.is_portable(
+        pytd.NamedType("typing.Callable")))
+
+
+if __name__ == "__main__":
+  test_base.main()
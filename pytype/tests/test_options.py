@@ -119,6 +119,76 @@ class OptionsTest(test_base.BaseTest):
         foo.get_bar()
     """, deep=False, maximum_depth=3, init_maximum_depth=4)
 
+  def test_opcode_budget(self):
+    self.ConfigureOptions(function_opcode_budget=12)
+    ty = self.Infer("""
+      def f1(xs):
+        y = 0
+        for x in xs:
+          if x:
+            y += 1
+          else:
+            y -= 1
+        return y
+      def f2():
+        return f1([1])
+      def f3():
+        return 1
+    """)
+    self.assertTypesMatchPytd(ty, """
+      from typing import Any
+      def f1(xs) -> Any: ...
+      def f2() -> Any: ...
+      def f3() -> int: ...
+    """)
+
+  def test_budget_with_annotation(self):
+    self.ConfigureOptions(function_opcode_budget=12)
+    ty = self.Infer("""
+      def f1(xs) -> int:
+        y = 0
+        for x in xs:
+          if x:
+            y += 1
+          else:
+            y -= 1
+        return y
+      def f2():
+        return f1([1])
+    """)
+    self.assertTypesMatchPytd(ty, """
+      def f1(xs) -> int: ...
+      def f2() -> int: ...
+    """)
+
+  def test_cfg_node_budget(self):
+    self.ConfigureOptions(function_cfg_node_budget=5)
+    ty = self.Infer("""
+      def f(xs):
+        for x in xs:
+          if x:
+            return x
+        return None
+    """)
+    self.assertTypesMatchPytd(ty, """
+      from typing import Any
+      def f(xs) -> Any: ...
+    """)
+
+  def test_binding_budget(self):
+    self.ConfigureOptions(function_binding_budget=10)
+    ty = self.Infer("""
+      def f():
+        x = [1, 2, 3]
+        if x:
+          x = {1: 2}
+        return x
+    """)
+    self.assertTypesMatchPytd(ty, """
+      from typing import Any
+      def f() -> Any: ...
+    """)
+
 
 if __name__ == "__main__":
   test_base.main()
@@ -1,8 +1,7 @@
 """Tests for loading and saving pickled files."""
 
-import pickle
-
 from pytype.imports import pickle_utils
+from pytype.pytd import ast_encoding
 from pytype.pytd import visitors
 from pytype.tests import test_base
 from pytype.tests import test_utils
@@ -13,7 +12,7 @@ class PickleTest(test_base.BaseTest):
 
   def _verifyDeps(self, module, immediate_deps, late_deps):
     if isinstance(module, bytes):
-      data = pickle.loads(module)
+      data = pickle_utils.LoadAst(module)
       self.assertCountEqual(dict(data.dependencies), immediate_deps)
       self.assertCountEqual(dict(data.late_dependencies), late_deps)
     else:
@@ -193,20 +192,20 @@ class PickleTest(test_base.BaseTest):
       """)
 
   def test_exception(self):
-    old = pickle.load
+    old = ast_encoding.DecodeAst
     def load_with_error(*args, **kwargs):
       raise ValueError("error!")
     foo = """
       class A: pass
     """
-    pickle.load = load_with_error
+    ast_encoding.DecodeAst = load_with_error
     with self.DepTree([("foo.py", foo, {"pickle": True})]):
       with self.assertRaises(pickle_utils.LoadPickleError):
         self.Check("""
           import foo
           x = foo.A()
         """)
-    pickle.load = old
+    ast_encoding.DecodeAst = old
 
 
 if __name__ == "__main__":
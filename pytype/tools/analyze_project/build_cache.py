@@ -0,0 +1,109 @@
+"""A content-addressed cache of analyze_project job results.
+
+A job's key is a hash of everything that can affect its output: the pytype
+version, the job's pytype-single arguments, and the contents of its source
+file, its imports map and the outputs of the jobs it depends on. A job whose
+key matches the one recorded when it last succeeded, and whose output is still
+the one it produced, does not need to run again. Unlike ninja's mtime checks,
+this survives fresh checkouts and branch switches.
+
+Because keys include the contents of dependency outputs rather than their
+timestamps, a dependency that is re-analyzed but produces an identical .pyi
+does not invalidate its dependents.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+from typing import Dict, Optional
+
+from pytype import __version__
+from pytype.platform_utils import path_utils
+
+# The cache file, relative to the output directory.
+CACHE_FILE = 'build_cache.json'
+
+
+def hash_file(path: str) -> Optional[str]:
+  """Hash a file's contents, returning None if it cannot be read."""
+  try:
+    with open(path, 'rb') as f:
+      return hashlib.sha256(f.read()).hexdigest()
+  except OSError:
+    return None
+
+
+@dataclasses.dataclass
+class Entry:
+  """A cached job result.
+
+  Attributes:
+    key: The job's key when it last succeeded.
+    output_hash: The hash of the output the job produced.
+  """
+
+  key: str
+  output_hash: str
+
+
+class BuildCache:
+  """Keys and outputs of previously successful jobs, keyed by job output."""
+
+  def __init__(self, output_dir: str):
+    self.path = path_utils.join(output_dir, CACHE_FILE)
+    self._output_dir = output_dir
+    self.entries: Dict[str, Entry] = {}
+    self.hits = 0
+
+  def _name(self, output):
+    return path_utils.relpath(output, self._output_dir)
+
+  def load(self):
+    """Load the cache file, if there is a usable one."""
+    try:
+      with open(self.path) as f:
+        data = json.load(f)
+      self.entries = {k: Entry(**v) for k, v in data.items()}
+    except FileNotFoundError:
+      pass
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+      logging.warning('Ignoring unreadable build cache %s: %s', self.path, e)
+    return self
+
+  def save(self):
+    try:
+      with open(self.path, 'w') as f:
+        json.dump({k: dataclasses.asdict(v) for k, v in self.entries.items()},
+                  f, indent=1, sort_keys=True)
+    except OSError as e:
+      logging.warning('Could not write build cache %s: %s', self.path, e)
+
+  def get_key(self, job) -> str:
+    """Compute a job's key. All of its dependencies must have been built."""
+    h = hashlib.sha256()
+    parts = [__version__.__version__, *job.args]
+    for path in (job.input, job.imports, *job.deps):
+      parts.extend((path, hash_file(path) or '<missing>'))
+    for part in parts:
+      h.update(part.encode('utf-8'))
+      h.update(b'\0')
+    return h.hexdigest()
+
+  def is_fresh(self, job, key: str) -> bool:
+    """Whether the job's output is up to date."""
+    entry = self.entries.get(self._name(job.output))
+    fresh = bool(entry and entry.key == key and
+                 entry.output_hash == hash_file(job.output))
+    if fresh:
+      self.hits += 1
+    return fresh
+
+  def record(self, job, key: str):
+    """Record a successful run of a job."""
+    output_hash = hash_file(job.output)
+    if output_hash:
+      self.entries[self._name(job.output)] = Entry(key, output_hash)
+
+  def invalidate(self, job):
+    self.entries.pop(self._name(job.output), None)
@@ -0,0 +1,89 @@
+"""Tests for build_cache.py."""
+
+from pytype.platform_utils import path_utils
+from pytype.tests import test_utils
+from pytype.tools.analyze_project import build_cache
+from pytype.tools.analyze_project import scheduler
+
+import unittest
+
+
+class TestBuildCache(unittest.TestCase):
+  """Test build_cache.BuildCache."""
+
+  def setUp(self):
+    super().setUp()
+    self.tempdir = test_utils.Tempdir()
+    self.d = self.tempdir.__enter__()
+    self.src = self.d.create_file('foo.py', 'x = 1\n')
+    self.imports = self.d.create_file('foo.imports', 'bar bar.pyi\n')
+    self.dep = self.d.create_file('bar.pyi', 'y: int\n')
+    self.output = path_utils.join(self.d.path, 'foo.pyi')
+    self.job = scheduler.Job('foo', 'check', self.output, ('foo.py',),
+                             (self.dep,), self.src, self.imports)
+
+  def tearDown(self):
+    super().tearDown()
+    self.tempdir.__exit__(None, None, None)
+
+  def _build(self, cache, contents='x: int\n'):
+    key = cache.get_key(self.job)
+    with open(self.output, 'w') as f:
+      f.write(contents)
+    cache.record(self.job, key)
+
+  def test_fresh(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self.assertFalse(cache.is_fresh(self.job, cache.get_key(self.job)))
+    self._build(cache)
+    self.assertTrue(cache.is_fresh(self.job, cache.get_key(self.job)))
+    self.assertEqual(cache.hits, 1)
+
+  def test_source_changed(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    self.d.create_file('foo.py', 'x = "hello"\n')
+    self.assertFalse(cache.is_fresh(self.job, cache.get_key(self.job)))
+
+  def test_dependency_changed(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    self.d.create_file('bar.pyi', 'y: str\n')
+    self.assertFalse(cache.is_fresh(self.job, cache.get_key(self.job)))
+
+  def test_dependency_rewritten(self):
+    # Only the contents of dependencies matter, not their timestamps.
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    self.d.create_file('bar.pyi', 'y: int\n')
+    self.assertTrue(cache.is_fresh(self.job, cache.get_key(self.job)))
+
+  def test_args_changed(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    job = scheduler.Job('foo', 'check', self.output, ('--protocols', 'foo.py'),
+                        (self.dep,), self.src, self.imports)
+    self.assertFalse(cache.is_fresh(job, cache.get_key(job)))
+
+  def test_output_changed(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    self.d.create_file('foo.pyi', 'x: str\n')
+    self.assertFalse(cache.is_fresh(self.job, cache.get_key(self.job)))
+
+  def test_save_and_load(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    cache.save()
+    loaded = build_cache.BuildCache(self.d.path).load()
+    self.assertTrue(loaded.is_fresh(self.job, loaded.get_key(self.job)))
+
+  def test_invalidate(self):
+    cache = build_cache.BuildCache(self.d.path)
+    self._build(cache)
+    cache.invalidate(self.job)
+    self.assertFalse(cache.is_fresh(self.job, cache.get_key(self.job)))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -16,6 +16,9 @@ from pytype.tools import config
 
 _TOML = '.toml'
 
+# Values of the `scheduler` option.
+SCHEDULERS = ('ninja', 'native')
+
 
 # Args:
 #   flag: the name of the command-line flag.
@@ -63,6 +66,19 @@ ITEMS = {
         'to the number of CPUs on the host system.'),
     'output': Item(
         '.pytype', '.pytype', None, 'All pytype output goes here.'),
+    'precompiled_builtins': Item(
+        '', '', None,
+        'Precompiled builtins and typeshed stubs, generated with '
+        '`pytype-single --generate-builtins`. Jobs memory-map this file, so '
+        'parallel jobs share one copy of it.'),
+    'report_schedule': Item(
+        False, 'False', None,
+        'With the native scheduler, print the achieved parallelism and the '
+        'modules that bounded the run.'),
+    'scheduler': Item(
+        'ninja', 'ninja', None,
+        "How to schedule jobs: 'ninja' runs a build.ninja file, and 'native' "
+        'runs jobs in a pool of long-lived pytype worker processes.'),
     'platform': Item(
         '', sys.platform, None,
         'Platform (e.g., "linux", "win32") that the target code runs on.'),
@@ -144,8 +160,10 @@ def make_converters(cwd=None):
       'inputs': lambda v: file_utils.expand_source_files(v, cwd),
       'jobs': parse_jobs,
       'keep_going': string_to_bool,
+      'report_schedule': string_to_bool,
       'output': lambda v: file_utils.expand_path(v, cwd),
       'platform': get_platform,
+      'precompiled_builtins': lambda v: v and file_utils.expand_path(v, cwd),
       'python_version': get_python_version,
       'pythonpath': lambda v: file_utils.expand_pythonpath(v, cwd),
   }
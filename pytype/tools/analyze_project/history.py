@@ -0,0 +1,74 @@
+"""Per-job analysis history, used to schedule later analyze_project runs."""
+
+import dataclasses
+import json
+import logging
+from typing import Dict
+
+from pytype.platform_utils import path_utils
+from pytype.tools.analyze_project import worker
+
+# The history file, relative to the output directory.
+HISTORY_FILE = 'history.json'
+
+
+@dataclasses.dataclass
+class Entry:
+  """The measurements from the last run of a job.
+
+  Attributes:
+    walltime: The wall time taken by the job, in seconds.
+    peak_rss: The peak resident set size during the job, in KiB.
+  """
+
+  walltime: float
+  peak_rss: int
+
+
+class JobHistory:
+  """Measurements of previous jobs, keyed by job output."""
+
+  def __init__(self, output_dir: str):
+    self.path = path_utils.join(output_dir, HISTORY_FILE)
+    self._output_dir = output_dir
+    self.entries: Dict[str, Entry] = {}
+
+  def _key(self, output):
+    # Keys are relative to the output directory so that the history survives
+    # the project being moved.
+    return path_utils.relpath(output, self._output_dir)
+
+  def load(self):
+    """Load the history file, if there is a usable one."""
+    try:
+      with open(self.path) as f:
+        data = json.load(f)
+      self.entries = {k: Entry(**v) for k, v in data.items()}
+    except FileNotFoundError:
+      pass
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+      logging.warning('Ignoring unreadable job history %s: %s', self.path, e)
+    return self
+
+  def save(self):
+    try:
+      with open(self.path, 'w') as f:
+        json.dump({k: dataclasses.asdict(v) for k, v in self.entries.items()},
+                  f, indent=1, sort_keys=True)
+    except OSError as e:
+      logging.warning('Could not write job history %s: %s', self.path, e)
+
+  def record(self, output: str, result: worker.JobResult):
+    self.entries[self._key(output)] = Entry(result.walltime, result.peak_rss)
+
+  def get(self, output: str) -> Entry:
+    return self.entries.get(self._key(output))
+
+  def get_costs(self, outputs) -> Dict[str, float]:
+    """Get a map from job output to the job's last wall time."""
+    costs = {}
+    for output in outputs:
+      entry = self.get(output)
+      if entry:
+        costs[output] = entry.walltime
+    return costs
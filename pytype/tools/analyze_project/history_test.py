@@ -0,0 +1,35 @@
+"""Tests for history.py."""
+
+from pytype.platform_utils import path_utils
+from pytype.tests import test_utils
+from pytype.tools.analyze_project import history
+from pytype.tools.analyze_project import worker
+
+import unittest
+
+
+class TestJobHistory(unittest.TestCase):
+  """Test history.JobHistory."""
+
+  def test_round_trip(self):
+    with test_utils.Tempdir() as d:
+      h = history.JobHistory(d.path)
+      output = path_utils.join(d.path, 'pyi', 'foo.pyi')
+      h.record(output, worker.JobResult(0, '', 1.5, 2048))
+      h.save()
+      loaded = history.JobHistory(d.path).load()
+    self.assertEqual(loaded.get(output), history.Entry(1.5, 2048))
+    self.assertEqual(loaded.get_costs([output, 'bar.pyi']), {output: 1.5})
+
+  def test_missing(self):
+    with test_utils.Tempdir() as d:
+      self.assertFalse(history.JobHistory(d.path).load().entries)
+
+  def test_corrupt(self):
+    with test_utils.Tempdir() as d:
+      d.create_file(history.HISTORY_FILE, '{"foo.pyi": 3}')
+      self.assertFalse(history.JobHistory(d.path).load().entries)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -142,7 +142,10 @@ def make_parser():
       (('inputs',), {'metavar': 'input', 'nargs': '*', 'action': 'flatten'}),
       (('-k', '--keep-going'), {'action': 'store_true', 'type': None}),
       (('-j', '--jobs'), {'action': 'store', 'metavar': 'N'}),
+      (('--scheduler',), {'choices': config.SCHEDULERS}),
+      (('--report-schedule',), {'action': 'store_true', 'type': None}),
       (('--platform',),),
+      (('--precompiled-builtins',),),
       (('-P', '--pythonpath'),),
       (('-V', '--python-version'),)
   ]:
@@ -12,7 +12,10 @@ from pytype import file_utils
 from pytype import module_utils
 from pytype import utils
 from pytype.platform_utils import path_utils
+from pytype.tools.analyze_project import build_cache
 from pytype.tools.analyze_project import config
+from pytype.tools.analyze_project import history
+from pytype.tools.analyze_project import scheduler
 
 # Generate a default pyi for builtin and system dependencies.
 DEFAULT_PYI = """
@@ -180,6 +183,7 @@ class PytypeRunner:
     self.sorted_sources = sorted_sources
     self.python_version = conf.python_version
     self.platform = conf.platform
+    self.precompiled_builtins = conf.precompiled_builtins
     self.pyi_dir = path_utils.join(conf.output, 'pyi')
     self.imports_dir = path_utils.join(conf.output, 'imports')
     self.ninja_file = path_utils.join(conf.output, 'build.ninja')
@@ -187,6 +191,11 @@ class PytypeRunner:
         (k, getattr(conf, k)) for k in set(conf.__slots__) - set(config.ITEMS)]
     self.keep_going = conf.keep_going
     self.jobs = conf.jobs
+    self.scheduler = conf.scheduler
+    self.report_schedule = conf.report_schedule
+    self.output_dir = conf.output
+    # all build statements, as scheduler.Job objects in dependency order
+    self.build_jobs = []
 
   def set_custom_options(self, flags_with_values, binary_flags, report_errors):
     """Merge self.custom_options into flags_with_values and binary_flags."""
@@ -219,7 +228,10 @@ class PytypeRunner:
         '--quick',
         '--analyze-annotated' if report_errors else '--no-report-errors',
         '--nofail',
+        '--skip-unchanged-output',
     }
+    if self.precompiled_builtins:
+      flags_with_values['--precompiled-builtins'] = self.precompiled_builtins
     self.set_custom_options(flags_with_values, binary_flags, report_errors)
     # Order the flags so that ninja recognizes commands across runs.
     return (
@@ -229,6 +241,29 @@ class PytypeRunner:
         ['$in']
     )
 
+  def get_pytype_args(self, module, action, imports, output):
+    """Get the pytype-single arguments for a build statement.
+
+    Args:
+      module: A module_utils.Module object.
+      action: An Action object.
+      imports: An imports file.
+      output: The output file.
+
+    Returns:
+      The arguments, with the ninja variables filled in.
+    """
+    variables = {
+        '$imports': imports,
+        '$out': output,
+        '$module': module.name,
+        '$in': module.full_path,
+    }
+    command = self.get_pytype_command_for_ninja(
+        report_errors=action == Action.CHECK)
+    return tuple(variables.get(arg, arg)
+                 for arg in command[len(PYTYPE_SINGLE):])
+
   def make_imports_dir(self):
     try:
       file_utils.makedirs(self.imports_dir)
@@ -316,7 +351,10 @@ class PytypeRunner:
         f.write(
             'rule {action}\n'
             '  command = {command}\n'
-            '  description = {action} $module\n'.format(
+            '  description = {action} $module\n'
+            # pytype-single leaves unchanged outputs alone, and restat tells
+            # ninja to then skip the dependents of such outputs.
+            '  restat = 1\n'.format(
                 action=action, command=command)
         )
 
@@ -388,11 +426,55 @@ class PytypeRunner:
       # Don't depend on default.pyi, since it's regenerated every time.
       deps = tuple(module_to_output[m] for m in deps
                    if module_to_output[m] != default_output)
-      module_to_output[module] = self.write_build_statement(
+      output = module_to_output[module] = self.write_build_statement(
           module, action, deps, imports, suffix)
+      self.build_jobs.append(scheduler.Job(
+          module.name, action, output,
+          self.get_pytype_args(module, action, imports, output), deps,
+          module.full_path, imports))
     return files
 
   def build(self):
+    """Run the build with the configured scheduler."""
+    if self.scheduler == 'native':
+      return self.build_native()
+    if self.report_schedule:
+      logging.warning('--report-schedule requires --scheduler=native')
+    return self.build_ninja()
+
+  def build_native(self):
+    """Run the build jobs in a pool of pytype worker processes."""
+    # Like ninja, create the output directories before running any jobs.
+    for output_dir in {path_utils.dirname(j.output) for j in self.build_jobs}:
+      file_utils.makedirs(output_dir)
+    # Schedule by the time each job took last time. Jobs we have not seen
+    # before are assumed to take an average amount of time.
+    job_history = history.JobHistory(self.output_dir).load()
+    outputs = [j.output for j in self.build_jobs]
+    costs = job_history.get_costs(outputs)
+    if costs:
+      default_cost = sum(costs.values()) / len(costs)
+      costs = {output: costs.get(output, default_cost) for output in outputs}
+    cache = build_cache.BuildCache(self.output_dir).load()
+    sched = scheduler.Scheduler(
+        self.build_jobs, self.jobs, self.keep_going, costs, cache=cache)
+    ret = sched.run()
+    cache.save()
+    for output, result in sched.results.items():
+      if output not in sched.cached:
+        job_history.record(output, result)
+    job_history.save()
+    if cache.hits:
+      print(f'Skipped {cache.hits} up-to-date jobs')
+    skipped = sched.get_skipped()
+    if skipped:
+      logging.warning('Skipped %d jobs because of failed dependencies',
+                      len(skipped))
+    if self.report_schedule:
+      print(sched.get_report())
+    return ret
+
+  def build_ninja(self):
     """Execute the build.ninja file."""
     # -k N     keep going until N jobs fail (0 means infinity)
     # -C DIR   change to DIR before doing anything else
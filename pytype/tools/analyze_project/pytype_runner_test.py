@@ -43,7 +43,7 @@ class ExpectedBuildStatement:
 
 
 # number of lines in the build.ninja preamble
-_PREAMBLE_LENGTH = 6
+_PREAMBLE_LENGTH = 8
 
 
 class FakeImportGraph:
@@ -353,6 +353,14 @@ class TestGetRunCmd(TestBase):
     options = self.get_options(args)
     self.assertEqual(options.disable, ['import-error', 'name-error'])
 
+  def test_precompiled_builtins(self):
+    self.assertIsNone(self.get_basic_options().precompiled_builtins)
+    custom_conf = self.parser.config_from_defaults()
+    custom_conf.precompiled_builtins = 'builtins.pickle'
+    self.runner = make_runner([], [], custom_conf)
+    self.assertEqual(self.get_basic_options().precompiled_builtins,
+                     'builtins.pickle')
+
   def test_custom_option_no_report_errors(self):
     custom_conf = self.parser.config_from_defaults()
     # If the --precise-return flag is ever removed, replace it with another
@@ -486,20 +494,23 @@ class TestNinjaPreamble(TestBase):
       with open(runner.ninja_file) as f:
         preamble = f.read().splitlines()
     self.assertEqual(len(preamble), _PREAMBLE_LENGTH)
-    # The preamble consists of triples of lines of the format:
+    # The preamble consists of groups of lines of the format:
     # rule {name}
     #   command = pytype-single {args} $in
     #   description = {name} $module
+    #   restat = 1
     # Check that the lines cycle through these patterns.
     for i, line in enumerate(preamble):
-      if not i % 3:
+      if not i % 4:
         self.assertRegex(line, r'rule \w*')
-      elif i % 3 == 1:
+      elif i % 4 == 1:
         expected = r'  command = {} .* \$in'.format(
             re.escape(' '.join(pytype_runner.PYTYPE_SINGLE)))
         self.assertRegex(line, expected)
-      else:
+      elif i % 4 == 2:
         self.assertRegex(line, r'  description = \w* \$module')
+      else:
+        self.assertEqual(line, '  restat = 1')
 
 
 class TestNinjaBuildStatement(TestBase):
@@ -752,6 +763,48 @@ class TestNinjaBody(TestBase):
             module='foo'))
 
 
+class TestBuildJobs(TestBase):
+  """Test the jobs recorded by PytypeRunner.setup_build."""
+
+  def setUp(self):
+    super().setUp()
+    self.conf = self.parser.config_from_defaults()
+
+  def test_jobs(self):
+    src = Module('', 'foo.py', 'foo')
+    dep = Module('', 'bar.py', 'bar')
+    with test_utils.Tempdir() as d:
+      self.conf.output = d.path
+      runner = make_runner(
+          [src], [((dep,), ()), ((src,), (dep,))], self.conf)
+      runner.setup_build()
+    bar_pyi = path_utils.join(runner.pyi_dir, 'bar.pyi')
+    foo_pyi = path_utils.join(runner.pyi_dir, 'foo.pyi')
+    self.assertEqual(
+        [(j.module, j.action, j.output, j.deps) for j in runner.build_jobs],
+        [('bar', Action.INFER, bar_pyi, ()),
+         ('foo', Action.CHECK, foo_pyi, (bar_pyi,))])
+
+  def test_args(self):
+    runner = make_runner([], [], self.conf)
+    module = Module('', 'foo.py', 'foo')
+
+    def get_options(action):
+      args = list(runner.get_pytype_args(module, action, 'foo.imports',
+                                         'foo.pyi'))
+      i = args.index('--imports_info')
+      self.assertEqual(args.pop(i + 1), 'foo.imports')
+      args.pop(i)
+      return pytype_config.Options(args, command_line=True)
+
+    options = get_options(Action.CHECK)
+    self.assertEqual(options.output, 'foo.pyi')
+    self.assertEqual(options.module_name, 'foo')
+    self.assertEqual(options.input, 'foo.py')
+    self.assertTrue(options.report_errors)
+    self.assertFalse(get_options(Action.INFER).report_errors)
+
+
 class TestImports(TestBase):
   """Test imports-related functionality."""
 
@@ -0,0 +1,242 @@
+"""A native scheduler for analyze_project, as an alternative to ninja.
+
+The scheduler walks the dependency graph of pytype-single jobs itself and runs
+ready jobs in a pool of long-lived worker processes (see worker.py). When more
+jobs are ready than there are workers, jobs on the critical path (the most
+expensive chain of dependents) are started first. Jobs that a build cache
+reports as up to date are not run at all.
+"""
+
+import concurrent.futures
+import dataclasses
+import heapq
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from pytype.tools.analyze_project import build_cache
+from pytype.tools.analyze_project import worker
+
+
+@dataclasses.dataclass(eq=True, frozen=True)
+class Job:
+  """A pytype-single invocation.
+
+  Attributes:
+    module: The name of the module being analyzed.
+    action: The pytype_runner.Action being performed.
+    output: The output file, which uniquely identifies the job.
+    args: The pytype-single command line arguments.
+    deps: The outputs of other jobs that must finish before this one runs.
+    input: The source file.
+    imports: The imports map file.
+  """
+
+  module: str
+  action: str
+  output: str
+  args: Tuple[str, ...]
+  deps: Tuple[str, ...]
+  input: str = ''
+  imports: str = ''
+
+
+# The worker owned by the current pool process.
+_worker: Optional[worker.Worker] = None
+
+
+def _init_worker():
+  global _worker
+  _worker = worker.Worker()
+
+
+def run_job(args: Sequence[str]) -> worker.JobResult:
+  """Run a job in the current pool process's worker."""
+  assert _worker, 'Not in a worker process'
+  return _worker.run(args)
+
+
+def get_priorities(jobs: Sequence[Job],
+                   costs: Optional[Dict[str, float]] = None
+                  ) -> Dict[str, float]:
+  """Get each job's priority: the cost of its most expensive dependent chain.
+
+  Args:
+    jobs: The jobs, in dependency order.
+    costs: Optional map from job output to estimated cost. Jobs without an
+      estimate have a cost of 1.
+
+  Returns:
+    A map from job output to priority.
+  """
+  costs = costs or {}
+  dependents = {job.output: [] for job in jobs}
+  for job in jobs:
+    for dep in job.deps:
+      if dep in dependents:
+        dependents[dep].append(job.output)
+  priorities = {}
+  for job in reversed(jobs):
+    tail = max((priorities[d] for d in dependents[job.output]), default=0)
+    priorities[job.output] = costs.get(job.output, 1) + tail
+  return priorities
+
+
+class Scheduler:
+  """Runs jobs in dependency order in a process pool."""
+
+  def __init__(self, jobs: Sequence[Job], num_workers: int, keep_going: bool,
+               costs: Optional[Dict[str, float]] = None,
+               run: Callable[[Sequence[str]], worker.JobResult] = run_job,
+               cache: Optional[build_cache.BuildCache] = None):
+    """Initialize.
+
+    Args:
+      jobs: The jobs, in dependency order.
+      num_workers: The number of jobs to run in parallel.
+      keep_going: Whether to keep running independent jobs after a failure.
+      costs: Optional map from job output to estimated cost.
+      run: The function that runs a job in a pool process.
+      cache: Optionally, a cache of up-to-date jobs.
+    """
+    self.jobs = list(jobs)
+    self.num_workers = max(num_workers, 1)
+    self.keep_going = keep_going
+    self.priorities = get_priorities(self.jobs, costs)
+    self._run = run
+    self._cache = cache
+    self.results: Dict[str, worker.JobResult] = {}
+    # Outputs of jobs that were up to date and therefore not run.
+    self.cached: Set[str] = set()
+    # Wall clock start and end times of each job, as seen by the scheduler.
+    self.start_times: Dict[str, float] = {}
+    self.end_times: Dict[str, float] = {}
+
+  def _make_executor(self):
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=self.num_workers, initializer=_init_worker)
+
+  def _report(self, job, result):
+    cached = ' (cached)' if job.output in self.cached else ''
+    print(f'[{len(self.results)}/{len(self.jobs)}] {job.action} {job.module}'
+          f'{cached}')
+    if result.stderr:
+      sys.stderr.write(result.stderr)
+
+  def run(self, executor=None) -> int:
+    """Run all jobs.
+
+    Args:
+      executor: Optionally, a concurrent.futures.Executor to run jobs in.
+
+    Returns:
+      0 if all jobs succeeded, 1 otherwise.
+    """
+    by_output = {job.output: job for job in self.jobs}
+    order = {job.output: i for i, job in enumerate(self.jobs)}
+    waiting_on = {}
+    dependents = {job.output: [] for job in self.jobs}
+    for job in self.jobs:
+      # Dependencies that no job produces are already available.
+      waiting_on[job.output] = {d for d in job.deps if d in by_output}
+      for dep in waiting_on[job.output]:
+        dependents[dep].append(job.output)
+    ready = []
+
+    def push(job):
+      # Ties are broken by file order to keep runs deterministic.
+      heapq.heappush(ready, (-self.priorities[job.output], order[job.output],
+                             job.output))
+
+    for job in self.jobs:
+      if not waiting_on[job.output]:
+        push(job)
+    failed = False
+    running = {}
+    keys = {}
+
+    def finish(job, result):
+      nonlocal failed
+      self.results[job.output] = result
+      self._report(job, result)
+      if result.returncode:
+        # As in ninja, a failed job's dependents are never run.
+        failed = True
+        if self._cache:
+          self._cache.invalidate(job)
+        return
+      if self._cache and job.output in keys:
+        self._cache.record(job, keys[job.output])
+      for dependent in dependents[job.output]:
+        waiting_on[dependent].discard(job.output)
+        if not waiting_on[dependent]:
+          push(by_output[dependent])
+
+    with executor or self._make_executor() as pool:
+      while ready or running:
+        while ready and len(running) < self.num_workers:
+          if failed and not self.keep_going:
+            ready.clear()
+            break
+          *_, output = heapq.heappop(ready)
+          job = by_output[output]
+          if self._cache:
+            keys[output] = self._cache.get_key(job)
+            if self._cache.is_fresh(job, keys[output]):
+              self.cached.add(output)
+              finish(job, worker.JobResult(0, '', 0.0))
+              continue
+          self.start_times[output] = time.time()
+          running[pool.submit(self._run, job.args)] = job
+        if not running:
+          break
+        done, _ = concurrent.futures.wait(
+            running, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+          job = running.pop(future)
+          self.end_times[job.output] = time.time()
+          finish(job, future.result())
+    return 1 if failed else 0
+
+  def get_skipped(self) -> List[Job]:
+    """Jobs that were not run because a dependency failed."""
+    return [job for job in self.jobs if job.output not in self.results]
+
+  def get_bounding_jobs(self) -> List[Job]:
+    """Get the chain of jobs that bounded the run, in the order they ran.
+
+    Starting from the job that finished last, we repeatedly step to the
+    dependency that finished last, since that is what the job waited for.
+
+    Returns:
+      A list of jobs.
+    """
+    if not self.end_times:
+      return []
+    by_output = {job.output: job for job in self.jobs}
+    chain = []
+    output = max(self.end_times, key=self.end_times.get)
+    while output:
+      job = by_output[output]
+      chain.append(job)
+      deps = [d for d in job.deps if d in self.end_times]
+      output = max(deps, key=self.end_times.get) if deps else None
+    return chain[::-1]
+
+  def get_report(self) -> str:
+    """Summarize the achieved parallelism and the jobs that bounded the run."""
+    if not self.end_times:
+      return 'No jobs were run.'
+    elapsed = max(self.end_times.values()) - min(self.start_times.values())
+    busy = sum(self.end_times[k] - self.start_times[k] for k in self.end_times)
+    lines = [
+        f'Ran {len(self.end_times)} of {len(self.jobs)} jobs with '
+        f'{self.num_workers} workers in {elapsed:.2f}s',
+        f'Achieved parallelism: {busy / elapsed if elapsed else 0:.2f}',
+        'Jobs that bounded the run:',
+    ]
+    for job in self.get_bounding_jobs():
+      result = self.results[job.output]
+      lines.append(f'  {result.walltime:8.2f}s {result.peak_rss // 1024:6d}MiB'
+                   f'  {job.action} {job.module}')
+    return '\n'.join(lines)
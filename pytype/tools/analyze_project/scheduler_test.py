@@ -0,0 +1,183 @@
+"""Tests for scheduler.py."""
+
+import concurrent.futures
+import contextlib
+import io
+import threading
+
+from pytype.platform_utils import path_utils
+from pytype.tests import test_utils
+from pytype.tools.analyze_project import build_cache
+from pytype.tools.analyze_project import scheduler
+from pytype.tools.analyze_project import worker
+
+import unittest
+
+
+def make_job(output, deps=()):
+  return scheduler.Job(module=output, action='check', output=output,
+                       args=(output,), deps=tuple(deps))
+
+
+class FakeRunner:
+  """Records the order in which jobs run and fails some of them."""
+
+  def __init__(self, failures=()):
+    self.order = []
+    self.failures = set(failures)
+    self._lock = threading.Lock()
+
+  def __call__(self, args):
+    output, = args
+    with self._lock:
+      self.order.append(output)
+    return worker.JobResult(int(output in self.failures), '', 0.0)
+
+
+class TestPriorities(unittest.TestCase):
+  """Test get_priorities."""
+
+  def test_chain(self):
+    jobs = [make_job('a'), make_job('b', ['a']), make_job('c', ['b'])]
+    self.assertEqual(scheduler.get_priorities(jobs),
+                     {'a': 3, 'b': 2, 'c': 1})
+
+  def test_costs(self):
+    jobs = [make_job('a'), make_job('b'), make_job('c', ['a', 'b'])]
+    self.assertEqual(
+        scheduler.get_priorities(jobs, {'a': 5, 'c': 2}),
+        {'a': 7, 'b': 3, 'c': 2})
+
+  def test_external_dep(self):
+    jobs = [make_job('a', ['default.pyi'])]
+    self.assertEqual(scheduler.get_priorities(jobs), {'a': 1})
+
+
+class TestScheduler(unittest.TestCase):
+  """Test Scheduler.run."""
+
+  def _run(self, jobs, runner, keep_going=False, costs=None):
+    sched = scheduler.Scheduler(jobs, 1, keep_going, costs, run=runner)
+    with contextlib.redirect_stdout(io.StringIO()):
+      ret = sched.run(concurrent.futures.ThreadPoolExecutor(1))
+    return sched, ret
+
+  def test_dependency_order(self):
+    jobs = [make_job('a'), make_job('b', ['a']), make_job('c', ['a', 'b'])]
+    runner = FakeRunner()
+    _, ret = self._run(jobs, runner)
+    self.assertEqual(ret, 0)
+    self.assertEqual(runner.order, ['a', 'b', 'c'])
+
+  def test_critical_path_first(self):
+    # 'd' heads the longest chain, so it runs before the independent jobs.
+    jobs = [make_job('a'), make_job('b'), make_job('d'),
+            make_job('e', ['d']), make_job('f', ['e'])]
+    runner = FakeRunner()
+    self._run(jobs, runner)
+    self.assertEqual(runner.order[0], 'd')
+
+  def test_costs(self):
+    jobs = [make_job('a'), make_job('b')]
+    runner = FakeRunner()
+    self._run(jobs, runner, costs={'b': 10})
+    self.assertEqual(runner.order, ['b', 'a'])
+
+  def test_failure(self):
+    jobs = [make_job('a'), make_job('b', ['a']), make_job('c')]
+    runner = FakeRunner(failures={'a'})
+    sched, ret = self._run(jobs, runner)
+    self.assertEqual(ret, 1)
+    self.assertEqual(runner.order, ['a'])
+    self.assertCountEqual([j.output for j in sched.get_skipped()], ['b', 'c'])
+
+  def test_keep_going(self):
+    jobs = [make_job('a'), make_job('b', ['a']), make_job('c')]
+    runner = FakeRunner(failures={'a'})
+    sched, ret = self._run(jobs, runner, keep_going=True)
+    self.assertEqual(ret, 1)
+    self.assertCountEqual(runner.order, ['a', 'c'])
+    self.assertEqual([j.output for j in sched.get_skipped()], ['b'])
+
+  def test_stream_errors(self):
+    jobs = [make_job('a')]
+    sched = scheduler.Scheduler(
+        jobs, 1, False,
+        run=lambda args: worker.JobResult(1, 'some error\n', 0.0))
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+      sched.run(concurrent.futures.ThreadPoolExecutor(1))
+    self.assertEqual(stdout.getvalue(), '[1/1] check a\n')
+    self.assertEqual(stderr.getvalue(), 'some error\n')
+
+
+class TestCache(unittest.TestCase):
+  """Test Scheduler.run with a build cache."""
+
+  def _run(self, d, jobs, outputs):
+    """Run the jobs, with each job writing outputs[job.output]."""
+    ran = []
+
+    def run(args):
+      output, = args
+      ran.append(output)
+      with open(output, 'w') as f:
+        f.write(outputs[output])
+      return worker.JobResult(0, '', 0.0)
+
+    cache = build_cache.BuildCache(d.path)
+    cache.load()
+    sched = scheduler.Scheduler(jobs, 1, False, run=run, cache=cache)
+    with contextlib.redirect_stdout(io.StringIO()):
+      sched.run(concurrent.futures.ThreadPoolExecutor(1))
+    cache.save()
+    return ran
+
+  def test_early_cutoff(self):
+    with test_utils.Tempdir() as d:
+      a_src = d.create_file('a.py', 'def f(): return 1\n')
+      b_src = d.create_file('b.py', 'import a\n')
+      a, b = (path_utils.join(d.path, x) for x in ('a.pyi', 'b.pyi'))
+      jobs = [scheduler.Job('a', 'infer', a, (a,), (), a_src),
+              scheduler.Job('b', 'check', b, (b,), (a,), b_src)]
+      outputs = {a: 'def f() -> int: ...\n', b: 'import a\n'}
+      self.assertEqual(self._run(d, jobs, outputs), [a, b])
+      # Nothing changed.
+      self.assertEqual(self._run(d, jobs, outputs), [])
+      # A body-only change re-runs a, but its output is the same.
+      d.create_file('a.py', 'def f(): return 2\n')
+      self.assertEqual(self._run(d, jobs, outputs), [a])
+      # An interface change re-runs both.
+      d.create_file('a.py', 'def f(): return ""\n')
+      outputs[a] = 'def f() -> str: ...\n'
+      self.assertEqual(self._run(d, jobs, outputs), [a, b])
+
+
+class TestReport(unittest.TestCase):
+  """Test the schedule report."""
+
+  def setUp(self):
+    super().setUp()
+    jobs = [make_job('a'), make_job('b'), make_job('c', ['a', 'b'])]
+    self.sched = scheduler.Scheduler(jobs, 2, False)
+    for output, start, end in [('a', 0, 1), ('b', 0, 3), ('c', 3, 4)]:
+      self.sched.results[output] = worker.JobResult(0, '', end - start, 1024)
+      self.sched.start_times[output] = start
+      self.sched.end_times[output] = end
+
+  def test_bounding_jobs(self):
+    self.assertEqual([j.output for j in self.sched.get_bounding_jobs()],
+                     ['b', 'c'])
+
+  def test_report(self):
+    report = self.sched.get_report().splitlines()
+    self.assertEqual(report[:3], [
+        'Ran 3 of 3 jobs with 2 workers in 4.00s',
+        'Achieved parallelism: 1.25',
+        'Jobs that bounded the run:'])
+    self.assertEqual(len(report), 5)
+    self.assertTrue(report[3].endswith('check b'))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,186 @@
+"""A long-lived pytype-single worker for analyze_project.
+
+Running a fresh pytype-single interpreter per module means that every module
+pays for importing pytype and for loading builtins and typeshed. A worker
+instead analyzes many modules in one process, keeping the parsed builtins,
+typing and typeshed stubs warm between jobs.
+
+The worker speaks a line-based JSON protocol on stdin/stdout. Each request is a
+JSON object {"args": [...]} holding the pytype-single command line for one job,
+and is answered by a JSON object {"returncode": int, "stderr": str,
+"walltime": float, "peak_rss": int}. The worker exits on end of input.
+"""
+
+import contextlib
+import dataclasses
+import io
+import json
+import logging
+import subprocess
+import sys
+import time
+import types
+from typing import List, Sequence
+
+from pytype import config as pytype_config
+from pytype import io as pytype_io
+from pytype import load_pytd
+from pytype import utils
+try:
+  import resource  # pylint: disable=g-import-not-at-top
+except ImportError:
+  # Not available on Windows
+  resource: types.ModuleType = None
+
+
+_WORKER_MODULE = 'pytype.tools.analyze_project.worker'
+
+
+@dataclasses.dataclass
+class JobResult:
+  """The outcome of running one pytype-single job.
+
+  Attributes:
+    returncode: The exit status pytype-single would have returned.
+    stderr: Everything the job wrote to stderr (errors, logging).
+    walltime: The wall time taken by the job, in seconds.
+    peak_rss: The peak resident set size of the worker during the job, in KiB,
+      or 0 if unknown.
+  """
+
+  returncode: int
+  stderr: str
+  walltime: float
+  peak_rss: int = 0
+
+  def to_json(self) -> str:
+    return json.dumps(dataclasses.asdict(self))
+
+  @classmethod
+  def from_json(cls, line: str) -> 'JobResult':
+    return cls(**json.loads(line))
+
+
+def _reset_peak_rss():
+  """Reset the peak RSS of the current process, where supported (Linux)."""
+  try:
+    with open('/proc/self/clear_refs', 'w') as f:
+      f.write('5')
+  except OSError:
+    pass
+
+
+def _get_peak_rss():
+  """Get the peak RSS of the current process in KiB, or 0 if unknown."""
+  try:
+    with open('/proc/self/status') as f:
+      for line in f:
+        if line.startswith('VmHWM:'):
+          return int(line.split()[1])
+  except OSError:
+    pass
+  if resource:
+    # ru_maxrss cannot be reset, so this is the peak over the process lifetime.
+    # It is in bytes on macOS and in KiB elsewhere.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+  return 0
+
+
+class Worker:
+  """Runs pytype-single jobs in the current process."""
+
+  def __init__(self):
+    load_pytd.share_stub_loaders()
+    # Set up logging before the first job, so that the handler is not bound to
+    # that job's captured stderr.
+    if not logging.getLogger().handlers:
+      logging.basicConfig(format='%(levelname)s:%(name)s %(message)s')
+    self.jobs_run = 0
+
+  def _run(self, args):
+    try:
+      options = pytype_config.Options(list(args), command_line=True)
+    except SystemExit as e:
+      # argparse reports bad arguments by exiting.
+      return e.code if isinstance(e.code, int) else 2
+    # --timeout uses SIGALRM, which would kill the worker rather than the job,
+    # and --metrics/--profile are process-wide, so they are not supported here.
+    try:
+      return pytype_io.process_one_file(options)
+    except utils.UsageError as e:
+      print(str(e), file=sys.stderr)
+      return 1
+
+  def run(self, args: Sequence[str]) -> JobResult:
+    """Run one job, given its pytype-single command line arguments."""
+    stderr = io.StringIO()
+    _reset_peak_rss()
+    start = time.time()
+    # Logging handlers keep a reference to the stream that was current when
+    # they were set up, so we temporarily point them at the captured stream.
+    handlers = [h for h in logging.getLogger().handlers
+                if isinstance(h, logging.StreamHandler)]
+    old_streams = [h.setStream(stderr) for h in handlers]
+    try:
+      with contextlib.redirect_stderr(stderr):
+        # Keep stdout free for the protocol.
+        with contextlib.redirect_stdout(stderr):
+          returncode = self._run(args)
+    except Exception:  # pylint: disable=broad-except
+      logging.exception('Uncaught exception in pytype worker')
+      returncode = 1
+    finally:
+      for handler, stream in zip(handlers, old_streams):
+        handler.setStream(stream)
+    walltime = time.time() - start
+    self.jobs_run += 1
+    return JobResult(returncode, stderr.getvalue(), walltime, _get_peak_rss())
+
+
+def serve(infile, outfile):
+  """Serve jobs read from infile, writing one result per job to outfile."""
+  worker = Worker()
+  for line in infile:
+    if not line.strip():
+      continue
+    request = json.loads(line)
+    result = worker.run(request['args'])
+    outfile.write(result.to_json() + '\n')
+    outfile.flush()
+
+
+class WorkerProcess:
+  """A handle to a worker running in a subprocess."""
+
+  def __init__(self, python_exe=None):
+    self._proc = subprocess.Popen(
+        [python_exe or sys.executable, '-m', _WORKER_MODULE],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+  def run(self, args: List[str]) -> JobResult:
+    """Send a job to the worker and wait for its result."""
+    self._proc.stdin.write(json.dumps({'args': args}) + '\n')
+    self._proc.stdin.flush()
+    line = self._proc.stdout.readline()
+    if not line:
+      raise OSError(f'pytype worker exited with {self._proc.wait()}')
+    return JobResult.from_json(line)
+
+  def close(self):
+    self._proc.stdin.close()
+    self._proc.wait()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+
+def main():
+  serve(sys.stdin, sys.stdout)
+
+
+if __name__ == '__main__':
+  sys.exit(main())
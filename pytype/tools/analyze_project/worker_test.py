@@ -0,0 +1,71 @@
+"""Tests for worker.py."""
+
+import io
+import json
+import sys
+
+from pytype.platform_utils import path_utils
+from pytype.tests import test_utils
+from pytype.tools.analyze_project import worker
+
+import unittest
+
+
+class TestWorker(unittest.TestCase):
+  """Test worker.Worker."""
+
+  def _args(self, d, filename, *extra):
+    return ['-V', '{}.{}'.format(*sys.version_info[:2]),
+            '-o', path_utils.join(d.path, filename + 'i'), *extra,
+            path_utils.join(d.path, filename)]
+
+  def test_infer(self):
+    with test_utils.Tempdir() as d:
+      d.create_file('foo.py', 'def f(x): return 42\n')
+      result = worker.Worker().run(self._args(d, 'foo.py'))
+      self.assertEqual(result.returncode, 0)
+      self.assertGreaterEqual(result.peak_rss, 0)
+      with open(path_utils.join(d.path, 'foo.pyi')) as f:
+        self.assertIn('def f(x) -> int: ...', f.read())
+
+  def test_errors(self):
+    with test_utils.Tempdir() as d:
+      d.create_file('foo.py', 'x = 1 + ""\n')
+      result = worker.Worker().run(self._args(d, 'foo.py'))
+      self.assertEqual(result.returncode, 1)
+      self.assertIn('unsupported-operands', result.stderr)
+
+  def test_bad_args(self):
+    result = worker.Worker().run(['--no-such-flag'])
+    self.assertEqual(result.returncode, 2)
+    self.assertIn('--no-such-flag', result.stderr)
+
+  def test_many_jobs(self):
+    w = worker.Worker()
+    with test_utils.Tempdir() as d:
+      d.create_file('foo.py', 'import os\nx = os.getcwd()\n')
+      d.create_file('bar.py', 'import os\ny = os.sep\n')
+      for filename in ('foo.py', 'bar.py'):
+        self.assertEqual(w.run(self._args(d, filename)).returncode, 0)
+    self.assertEqual(w.jobs_run, 2)
+
+
+class TestServe(unittest.TestCase):
+  """Test the worker protocol."""
+
+  def test_serve(self):
+    with test_utils.Tempdir() as d:
+      d.create_file('foo.py', 'x = 1 + ""\n')
+      request = {'args': ['-V', '{}.{}'.format(*sys.version_info[:2]),
+                          path_utils.join(d.path, 'foo.py')]}
+      infile = io.StringIO(json.dumps(request) + '\n\n')
+      outfile = io.StringIO()
+      worker.serve(infile, outfile)
+    result, = [worker.JobResult.from_json(line)
+               for line in outfile.getvalue().splitlines()]
+    self.assertEqual(result.returncode, 1)
+    self.assertIn('unsupported-operands', result.stderr)
+
+
+if __name__ == '__main__':
+  unittest.main()
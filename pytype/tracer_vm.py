@@ -1,6 +1,7 @@
 """Code for checking and inferring types."""
 
 import collections
+import contextlib
 import dataclasses
 import enum
 import logging
@@ -190,11 +191,12 @@ class CallTracer(vm.VirtualMachine):
           fname.rsplit(".", 1)[-1] not in self._CONSTRUCTORS):
         log.info("%r has annotations, not analyzing further.", fname)
       else:
-        for f in method.iter_signature_functions():
-          node, args = self.create_method_arguments(node, f)
-          if f.is_classmethod and cls:
-            args = self._maybe_fix_classmethod_cls_arg(node, cls, f, args)
-          node, _ = self.call_function_with_args(node, val, args)
+        with self.analysis_budget(node, method):
+          for f in method.iter_signature_functions():
+            node, args = self.create_method_arguments(node, f)
+            if f.is_classmethod and cls:
+              args = self._maybe_fix_classmethod_cls_arg(node, cls, f, args)
+            node, _ = self.call_function_with_args(node, val, args)
     return node
 
   def call_with_fake_args(self, node0, funcv):
@@ -422,7 +424,25 @@ class CallTracer(vm.VirtualMachine):
     if instance in self._initialized_instances:
       self._call_init_on_binding(node, instance.to_binding(node))
 
+  @contextlib.contextmanager
+  def _profile_analysis(self, node, value):
+    """Charges the work done in the block to the analysis of value."""
+    profiler = self.ctx.analysis_profiler
+    if not profiler:
+      yield
+      return
+    profiler.enter_analysis(value, node)
+    try:
+      yield
+    finally:
+      # The profiler keeps track of the nodes created since node.
+      profiler.exit_analysis(value, node)
+
   def analyze_class(self, node, val):
+    with self._profile_analysis(node, val.data):
+      return self._analyze_class(node, val)
+
+  def _analyze_class(self, node, val):
     cls = val.data
     log.info("Analyzing class: %r", cls.full_name)
     self._analyzed_classes.add(cls)
@@ -463,7 +483,8 @@ class CallTracer(vm.VirtualMachine):
       log.info("Analyze functions: Skipping class method %s", val.data.name)
     else:
       node1 = self.ctx.connect_new_cfg_node(node0, f"Function:{val.data.name}")
-      node2 = self.maybe_analyze_method(node1, val)
+      with self._profile_analysis(node1, val.data):
+        node2 = self.maybe_analyze_method(node1, val)
       node2.ConnectTo(node0)
     return node0
 
@@ -18,7 +18,7 @@ import functools
 import itertools
 import logging
 import re
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
 
 from pytype import block_environment
 from pytype import compare
@@ -273,7 +273,40 @@ class _BranchTracker:
     return ret
 
 
+class _AnalysisBudget:
+  """Counts the work done to analyze a function, including its callees.
+
+  The counts are checked at the start of each block, so an analysis can overrun
+  its budget by at most one block per frame.
+  """
+
+  def __init__(self, ctx, node):
+    options = ctx.options
+    self._program = ctx.program
+    self._limits = (("opcode", options.function_opcode_budget),
+                    ("CFG node", options.function_cfg_node_budget),
+                    ("binding", options.function_binding_budget))
+    self._num_opcodes = 0
+    # Nodes and bindings are numbered in order of creation.
+    self._first_node_id = self._last_node_id = node.id
+    self._first_binding_id = self._program.next_binding_id
+    # The name of the exceeded budget, if any.
+    self.exceeded: Optional[str] = None
+
+  def spend(self, node, block):
+    """Charges a block that is about to be run to the budget."""
+    self._num_opcodes += len(block.code)
+    self._last_node_id = max(self._last_node_id, node.id)
+    counts = (self._num_opcodes, self._last_node_id - self._first_node_id,
+              self._program.next_binding_id - self._first_binding_id)
+    for (name, limit), count in zip(self._limits, counts):
+      if limit is not None and count > limit:
+        self.exceeded = name
+        break
+
+
 _opcode_counter = metrics.MapCounter("vm_opcode")
+_degraded_functions_metric = metrics.MapCounter("degraded_functions")
 
 
 class VirtualMachineError(Exception):
@@ -287,6 +320,17 @@ class VirtualMachine:
   class VirtualMachineRecursionError(Exception):
     pass
 
+  # Maps opcode classes to the byte_* method that runs the opcode and whether
+  # the opcode is an import. Each subclass gets its own table, filled in as
+  # opcodes are run, so that subclasses can override byte_* methods.
+  _dispatch_table: Dict[
+      Type[opcodes.Opcode],
+      Tuple[Callable[..., frame_state.FrameState], bool]] = {}
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    cls._dispatch_table = {}
+
   def __init__(self, ctx):
     """Construct a TypegraphVirtualMachine."""
     self.ctx = ctx  # context.Context
@@ -320,6 +364,13 @@ class VirtualMachine:
         Tuple[abstract.InterpreterFunction, opcodes.Opcode]] = []
 
     self._maximum_depth = None  # set by run_program() and analyze()
+    self._has_analysis_budget = any(
+        limit is not None for limit in (ctx.options.function_opcode_budget,
+                                        ctx.options.function_cfg_node_budget,
+                                        ctx.options.function_binding_budget))
+    self._analysis_budget: Optional[_AnalysisBudget] = None
+    # The first opcodes of functions whose analysis exceeded the budget.
+    self._degraded_functions: Set[opcodes.Opcode] = set()
     self._director = None
     self._analyzing = False  # Are we in self.analyze()?
     self._importing = False  # Are we importing another file?
@@ -405,6 +456,44 @@ class VirtualMachine:
   def is_at_maximum_depth(self):
     return len(self.frames) > self._maximum_depth
 
+  @contextlib.contextmanager
+  def analysis_budget(self, node, func):
+    """Limits the work done to analyze func, if budgets are configured.
+
+    Once the budget is exceeded, every running frame returns Any at the start
+    of its next block, and later calls of func are treated like calls at the
+    maximum depth. Nested analyses share the outermost budget.
+
+    Args:
+      node: The node at which the analysis starts.
+      func: The function being analyzed.
+
+    Yields:
+      None.
+    """
+    if not self._has_analysis_budget or self._analysis_budget:
+      yield
+      return
+    budget = self._analysis_budget = _AnalysisBudget(self.ctx, node)
+    try:
+      yield
+    finally:
+      self._analysis_budget = None
+    if budget.exceeded:
+      log.warning("Exceeded the %s budget while analyzing %r. Treating it as "
+                  "returning its annotated type or Any.", budget.exceeded,
+                  func.name)
+      self._degraded_functions.add(func.get_first_opcode())
+      _degraded_functions_metric.inc(func.name)
+
+  def is_over_budget(self):
+    """Whether the analysis budget has been exceeded."""
+    return bool(self._analysis_budget and self._analysis_budget.exceeded)
+
+  def is_degraded(self, func):
+    """Whether func's analysis exceeded the budget."""
+    return func.get_first_opcode() in self._degraded_functions
+
   def _handle_match_case(self, state, op):
     """Track type narrowing and default cases in a match statement."""
     assert self._branch_tracker is not None
@@ -441,6 +530,16 @@ class VirtualMachine:
     else:
       return state
 
+  @classmethod
+  def _add_to_dispatch_table(cls, op_class):
+    """Look up the byte_* method for an opcode class, and remember it."""
+    bytecode_fn = getattr(cls, f"byte_{op_class.__name__}", None)
+    if bytecode_fn is None:
+      raise VirtualMachineError(f"Unknown opcode: {op_class.__name__}")
+    dispatch = cls._dispatch_table[op_class] = (
+        bytecode_fn, op_class.is_import())
+    return dispatch
+
   def run_instruction(
       self, op: opcodes.Opcode, state: frame_state.FrameState
   ) -> frame_state.FrameState:
@@ -457,20 +556,22 @@ class VirtualMachine:
       VirtualMachineError: if a fatal error occurs.
     """
     assert self._branch_tracker is not None
-    _opcode_counter.inc(op.name)
+    if metrics.is_enabled():
+      _opcode_counter.inc(op.name)
+    if self.ctx.analysis_profiler:
+      self.ctx.analysis_profiler.count_opcode(state.node)
     self.frame.current_opcode = op
-    self._importing = "IMPORT" in op.__class__.__name__
+    dispatch = self._dispatch_table.get(op.__class__)
+    if dispatch is None:
+      dispatch = self._add_to_dispatch_table(op.__class__)
+    bytecode_fn, self._importing = dispatch
     if log.isEnabledFor(logging.INFO):
       vm_utils.log_opcode(op, state, self.frame, len(self.frames))
     # Track type and enum case narrowing in match statements (we need to do this
     # before we run the opcode).
     if op.line in self._branch_tracker.matches.match_cases:
       state = self._handle_match_case(state, op)
-    # dispatch
-    bytecode_fn = getattr(self, f"byte_{op.name}", None)
-    if bytecode_fn is None:
-      raise VirtualMachineError(f"Unknown opcode: {op.name}")
-    state = bytecode_fn(state, op)
+    state = bytecode_fn(self, state, op)
     if state.why in ("reraise", "NoReturn"):
       state = state.set_why("exception")
     implicit_return = (
@@ -509,6 +610,16 @@ class VirtualMachine:
       if not state:
         log.warning("Skipping block %d, nothing connects to it.", block.id)
         continue
+      if self._analysis_budget:
+        self._analysis_budget.spend(state.node, block)
+        if self._analysis_budget.exceeded:
+          log.info("Analysis budget exceeded. Returning Any from %s.",
+                   frame_name)
+          frame.return_variable.AddBinding(
+              self.ctx.convert.unsolvable, [], state.node)
+          can_return = True
+          return_nodes.append(state.node)
+          break
       self.block_env.add_block(frame, block)
       self.frame.current_block = block
       op = None
@@ -544,6 +655,18 @@ class VirtualMachine:
 
   def run_frame(self, frame, node, annotated_locals=None):
     """Run a frame (typically belonging to a method)."""
+    profiler = self.ctx.analysis_profiler
+    if not profiler:
+      return self._run_frame(frame, node, annotated_locals)
+    profiler.enter_frame(frame, node)
+    end_node = node
+    try:
+      end_node, ret = self._run_frame(frame, node, annotated_locals)
+    finally:
+      profiler.exit_frame(frame, end_node)
+    return end_node, ret
+
+  def _run_frame(self, frame, node, annotated_locals):
     self.push_frame(frame)
     try:
       can_return, return_nodes = self._run_frame_blocks(
@@ -99,6 +99,20 @@ class TraceTest(TraceVmTestBase):
               for op, symbol, _ in self.ctx.vm.opcode_traces]
     self.assertEqual(actual, expected)
 
+  def test_dispatch_to_override(self):
+    names = []
+    class NameTracingVM(TraceVM):
+      def byte_LOAD_NAME(self, state, op):
+        names.append(op.pretty_arg)
+        return super().byte_LOAD_NAME(state, op)
+    self.ctx.vm = NameTracingVM(self.ctx)
+    self.ctx.vm.run_program("x = 1\ny = x\n", "", maximum_depth=10)
+    self.assertEqual(names, ["x"])
+    # The override is not used by other VMs.
+    self.ctx.vm = TraceVM(self.ctx)
+    self.ctx.vm.run_program("x = 1\ny = x\n", "", maximum_depth=10)
+    self.assertEqual(names, ["x"])
+
 
 class AnnotationsTest(VmTestBase):
   """Tests for recording annotations."""